@@ -0,0 +1,9 @@
+def get_attributes(element, names) -> tuple:
+    """Returns the values of the named accessibility attributes of `element`, in order,
+    with None for any it doesn't have
+
+    Talon doesn't expose AXUIElementCopyMultipleAttributeValues, so for now this is one
+    `get` per attribute; fetching everything needed up front through here means only
+    this function changes once a batched call is available.
+    """
+    return tuple(element.get(name) for name in names)
@@ -0,0 +1,130 @@
+"""Counts the accessibility round trips made reading menu items and notifications,
+against synthetic trees.
+
+    python bench/bench_attributes.py [--repeats 100]
+
+"batched" is how many there would be if each `ax.get_attributes` call were a
+single AXUIElementCopyMultipleAttributeValues round trip, which Talon doesn't
+expose yet.
+"""
+
+import argparse
+import time
+
+try:
+    from . import talon_stubs
+    from .fake_menus import leaf_paths, synthetic_app
+    from .fake_notification_center import FakeNotificationCenter
+except ImportError:  # run as a script
+    import talon_stubs
+    from fake_menus import leaf_paths, synthetic_app
+    from fake_notification_center import FakeNotificationCenter
+
+saved_trips = 0  # round trips batching would save, since the last measurement
+
+
+def count_batches(*modules):
+    """Wraps each module's `get_attributes` to count the round trips batching saves"""
+
+    def wrap(get_attributes):
+        def counted(element, names):
+            global saved_trips
+            saved_trips += len(names) - 1
+            return get_attributes(element, names)
+
+        return counted
+
+    for module in modules:
+        module.get_attributes = wrap(module.get_attributes)
+
+
+def measure(name, f, calls, repeats):
+    """Reports ms, round trips and batched round trips per call, over `calls` calls
+    per repeat"""
+    global saved_trips
+    talon_stubs.Element.round_trips = saved_trips = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        f()
+    elapsed = time.perf_counter() - start
+    per_call = calls * repeats
+    trips = talon_stubs.Element.round_trips / per_call
+    print(
+        f"{name:<32} {elapsed / per_call * 1000:8.4f} ms"
+        f"  {trips:6.2f} round trips  {trips - saved_trips / per_call:6.2f} batched"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=100)
+    args = parser.parse_args()
+
+    talon = talon_stubs.install()
+    menu = talon_stubs.load("menu")
+    menu_snapshot = talon_stubs.load("menu_snapshot")
+    notification = talon_stubs.load("notification")
+    count_batches(menu, menu_snapshot, notification)
+
+    app = synthetic_app()
+    talon.ui.active = app
+    items = len(list(menu_snapshot.walk_menu_items(app)))
+    repeats = max(1, args.repeats // 10)
+    measure(
+        "walk menu, per item",
+        lambda: list(menu_snapshot.walk_menu_items(app)),
+        items,
+        repeats,
+    )
+    measure(
+        "crawl snapshot, per item",
+        lambda: menu_snapshot.MenuSnapshot.crawl(app),
+        items,
+        repeats,
+    )
+
+    snapshot = menu_snapshot.MenuSnapshot.crawl(app)
+    elements = [
+        element
+        for element, submenu in zip(snapshot.elements, snapshot.submenu)
+        if not submenu
+    ]
+    measure(
+        "menu_item_talon_key",
+        lambda: [menu.menu_item_talon_key(element, quiet=True) for element in elements],
+        len(elements),
+        args.repeats,
+    )
+
+    paths = [menu.menu_path_string(path) for path in leaf_paths(app)][:100]
+    for path in paths:  # fill the menu item cache
+        menu.Actions.menu_item_state(path)
+    measure(
+        "menu_item_state, cached",
+        lambda: [menu.Actions.menu_item_state(path) for path in paths],
+        len(paths),
+        args.repeats,
+    )
+
+    nc = FakeNotificationCenter(windows=1, groups=50)
+    window = nc.app.window_list[0]
+    groups = notification.Notification.groups_in_window(window)
+    measure(
+        "groups_in_window, per group",
+        lambda: notification.Notification.groups_in_window(window),
+        len(groups),
+        args.repeats,
+    )
+    measure(
+        "Notification.from_group",
+        lambda: [
+            notification.Notification.from_group(group, identifier)
+            for identifier, group in groups.items()
+        ],
+        len(groups),
+        args.repeats,
+    )
+
+
+if __name__ == "__main__":
+    main()
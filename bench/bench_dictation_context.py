@@ -0,0 +1,131 @@
+"""Measures how reading dictation context scales with document size, against a
+synthetic text field with the cursor in the middle.
+
+    python bench/bench_dictation_context.py [--sizes 1000 100000 10000000]
+
+For each size, reports milliseconds and characters transferred from the
+application per phrase, for:
+
+- full: reading the entire AXValue, as without windowed reads
+- windowed: reading only around the cursor with AXStringForRange
+- cached: checking that the cached context is still current
+- inserted: updating the cached context of a full read after inserting a phrase
+
+Strings the fake text field returns are copied through UTF-8, as they would be
+crossing from the application to Talon.
+"""
+
+import argparse
+import time
+
+try:
+    from . import talon_stubs
+    from .fake_menus import WORDS
+except ImportError:  # run as a script
+    import talon_stubs
+    from fake_menus import WORDS
+
+
+class TextField(talon_stubs.Element):
+    """A text field whose string attributes cost a copy, and count what they transfer"""
+
+    transferred = 0
+
+    def __init__(self, text: str):
+        super().__init__(
+            AXRole="AXTextArea",
+            AXValue=text,
+            AXNumberOfCharacters=len(text),
+            AXSelectedTextRange=talon_stubs.Span(len(text) // 2, len(text) // 2),
+            AXSharedCharacterRange=None,
+            AXStringForRange=lambda span: text[span.left : span.right],
+        )
+
+    def get(self, name, param=None):
+        value = super().get(name, param)
+        if isinstance(value, str):
+            TextField.transferred += len(value)
+            value = value.encode("utf-8").decode("utf-8")
+        return value
+
+
+def document(size: int) -> str:
+    words = []
+    length = 0
+    for n in range(size):
+        word = WORDS[n * 7919 % len(WORDS)]
+        words.append(word)
+        length += len(word) + 1
+        if length >= size:
+            break
+    return " ".join(words)[:size]
+
+
+def measure(f, repeats):
+    """Returns (ms, characters transferred) per call"""
+    TextField.transferred = 0
+    start = time.perf_counter()
+    for _ in range(repeats):
+        f()
+    elapsed = time.perf_counter() - start
+    return elapsed / repeats * 1000, TextField.transferred / repeats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10_000, 100_000, 1_000_000, 10_000_000],
+    )
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    talon = talon_stubs.install()
+    dictation_context = talon_stubs.load("dictation.dictation_context")
+    mod_actions = dictation_context.ModActions
+    for name in (
+        "accessibility_dictation_enabled",
+        "accessibility_adjust_context_for_application",
+        "accessibility_create_dictation_context",
+    ):
+        setattr(talon.actions.user, name, getattr(mod_actions, name))
+    talon_stubs.SETTINGS["user.accessibility_dictation"] = True
+    cache = dictation_context.CONTEXT_CACHE
+
+    print(
+        f"{'size':>10}  " + "  ".join(f"{name + ' ms/chars':>22}" for name in RESULTS)
+    )
+    for size in args.sizes:
+        el = TextField(document(size))
+        results = {}
+
+        def read():
+            cache.clear()
+            assert cache.get(el) is not None
+
+        for name, windowed in (("full", False), ("windowed", True)):
+            talon_stubs.SETTINGS[WINDOWED_READS] = windowed
+            results[name] = measure(read, args.repeats)
+
+        talon_stubs.SETTINGS[WINDOWED_READS] = False
+        read()
+        results["cached"] = measure(lambda: cache.get(el), args.repeats)
+
+        results["inserted"] = measure(lambda: cache.inserted("word "), args.repeats)
+
+        print(
+            f"{size:>10}  "
+            + "  ".join(
+                f"{ms:>10.3f}/{chars:>11.0f}"
+                for ms, chars in (results[name] for name in RESULTS)
+            )
+        )
+
+
+RESULTS = ("full", "windowed", "cached", "inserted")
+WINDOWED_READS = "user.accessibility_dictation_windowed_reads"
+
+if __name__ == "__main__":
+    main()
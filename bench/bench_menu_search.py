@@ -0,0 +1,80 @@
+"""Measures menu search against a synthetic menu bar of several thousand items:
+crawling it, building the search index, and answering queries, which should each
+take well under a millisecond.
+
+    python bench/bench_menu_search.py [--menus 15] [--items 200] [--queries 1000]
+"""
+
+import argparse
+import random
+import time
+
+try:
+    from . import talon_stubs
+    from .fake_menus import WORDS, synthetic_app
+except ImportError:  # run as a script
+    import talon_stubs
+    from fake_menus import WORDS, synthetic_app
+
+
+def timed(f, *args):
+    start = time.perf_counter()
+    result = f(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    print(
+        f"{name:<12} median {timings[len(timings) // 2]:6.3f} ms"
+        f"  p99 {timings[len(timings) * 99 // 100]:6.3f} ms"
+        f"  max {timings[-1]:6.3f} ms"
+        f"  under 1 ms: {sum(t < 1 for t in timings) / len(timings):6.1%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--menus", type=int, default=15)
+    parser.add_argument("--items", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args()
+
+    talon_stubs.install()
+    menu_snapshot = talon_stubs.load("menu_snapshot")
+
+    app = synthetic_app(
+        menus=args.menus, items=args.items, submenus=5, submenu_items=20
+    )
+    talon_stubs.Element.round_trips = 0
+    snapshot, ms = timed(menu_snapshot.MenuSnapshot.crawl, app)
+    print(
+        f"crawled {len(snapshot)} menu items in {ms:.1f} ms"
+        f" ({talon_stubs.Element.round_trips} round trips)"
+    )
+    index, ms = timed(menu_snapshot.MenuSearchIndex, snapshot)
+    snapshot.search_index = index
+    print(f"built the search index in {ms:.1f} ms ({len(index.postings)} trigrams)")
+
+    rng = random.Random(0)
+    rows = [row for row in range(len(snapshot)) if not snapshot.submenu[row]]
+    queries = {
+        # the title as it appears in the menu
+        "exact": lambda: snapshot.titles[rng.choice(rows)],
+        # as spoken, with a word of the title missing
+        "partial": lambda: " ".join(snapshot.titles[rng.choice(rows)].split()[1:])
+        or snapshot.titles[rng.choice(rows)],
+        "unrelated": lambda: " ".join(rng.sample(WORDS, 2)) + " xyzzy",
+    }
+    for name, query in queries.items():
+        timings = [timed(snapshot.search, query())[1] for _ in range(args.queries)]
+        report(f"search {name}", timings)
+
+    timings = [
+        timed(snapshot.rows_matching, rng.choice(WORDS))[1] for _ in range(args.queries)
+    ]
+    report("substring", timings)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Measures menu_select against a synthetic menu bar: a cold lookup from the menu
+bar, a lookup resumed from a menu shared with the previous path, and a hit in the
+menu item cache.
+
+    python bench/bench_menu_select.py [--paths 200]
+"""
+
+import argparse
+import random
+import time
+
+try:
+    from . import talon_stubs
+    from .fake_menus import leaf_paths, synthetic_app
+except ImportError:  # run as a script
+    import talon_stubs
+    from fake_menus import leaf_paths, synthetic_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paths", type=int, default=200)
+    args = parser.parse_args()
+
+    talon = talon_stubs.install()
+    menu = talon_stubs.load("menu")
+
+    app = synthetic_app()
+    talon.ui.active = app
+    paths = leaf_paths(app)
+    # siblings follow each other, as when a command selects several items in one menu
+    paths = sorted(random.Random(0).sample(paths, min(args.paths, len(paths))))
+    menu_paths = [menu.menu_path_string(path) for path in paths]
+    print(f"{len(leaf_paths(app))} menu items; selecting {len(menu_paths)} of them")
+
+    def run(name, before_each=None):
+        timings, trips = [], []
+        for menu_path in menu_paths:
+            if before_each is not None:
+                before_each()
+            talon_stubs.Element.round_trips = 0
+            start = time.perf_counter()
+            assert menu.Actions.menu_select(menu_path)
+            timings.append(time.perf_counter() - start)
+            trips.append(talon_stubs.Element.round_trips)
+        timings.sort()
+        print(
+            f"{name:<10} mean {sum(timings) / len(timings) * 1000:7.3f} ms"
+            f"  max {timings[-1] * 1000:7.3f} ms"
+            f"  mean round trips {sum(trips) / len(trips):6.1f}"
+        )
+
+    def cold():
+        menu.MENU_ITEM_CACHE.invalidate(app)
+        menu.MENU_PATH_RESOLVER.reset()
+
+    run("cold", before_each=cold)
+    # every path is new to the cache, which is filled for the next run
+    cold()
+    run("resumed")
+    cache = menu.MENU_ITEM_CACHE
+    cache.hits = cache.misses = 0
+    run("cached")
+    print(f"cache hits {cache.hits}, misses {cache.misses}")
+
+
+if __name__ == "__main__":
+    main()
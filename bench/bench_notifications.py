@@ -0,0 +1,133 @@
+"""Measures how notification scanning, actions and list generation scale with the
+number of notifications, against a synthetic Notification Center.
+
+    python bench/bench_notifications.py [--windows 1 10] [--groups 1 10 50]
+
+For each layout (AXGroup/AXButton groups, integer/UUID identifiers) and size,
+reports milliseconds, accessibility round trips and peak allocations for:
+
+- cold: the first scan, as when Talon starts
+- rescan: a full rescan when nothing has changed
+- new: a window reporting one new notification
+- animate: a window reporting one new notification, then changing 10 more times
+  (as banners do while they animate) before the scheduled update runs
+- action: performing an action on the top notification
+
+and how many times the Talon action and app lists were regenerated.
+"""
+
+import argparse
+import time
+import tracemalloc
+
+try:
+    from . import talon_stubs
+    from .fake_notification_center import FakeNotificationCenter, FakeWindowEvents
+except ImportError:  # run as a script
+    import talon_stubs
+    from fake_notification_center import FakeNotificationCenter, FakeWindowEvents
+
+LAYOUTS = (
+    ("AXGroup", False),
+    ("AXGroup", True),
+    ("AXButton", False),
+    ("AXButton", True),
+)
+
+
+def measure(f, repeats=1):
+    """Returns (ms per call, round trips per call, peak KiB allocated)"""
+    talon_stubs.Element.round_trips = 0
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        f()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (
+        elapsed / repeats * 1000,
+        talon_stubs.Element.round_trips / repeats,
+        peak / 1024,
+    )
+
+
+def bench(notification, windows, groups, role, uuids, repeats):
+    nc = FakeNotificationCenter(windows, groups, role=role, uuids=uuids)
+    talon = notification.ui
+    talon.running[:] = [nc.app]
+    notification.notification_group_role = None
+    notification.HISTORY = notification.NotificationHistory()
+
+    events = FakeWindowEvents()
+    monitor = None
+
+    def cold():
+        nonlocal monitor
+        monitor = notification.NotificationMonitor(nc.app, events=events)
+
+    results = {"cold": measure(cold)}
+    results["rescan"] = measure(monitor.update_notifications, repeats)
+
+    window = nc.app.window_list[0]
+
+    def new():
+        nc.add_group(window)
+        events.emit("created", window)
+
+    results["new"] = measure(new, repeats)
+
+    def animate():
+        nc.add_group(window)
+        for _ in range(11):
+            events.emit("changed", window)
+        talon_stubs.CRON.run_pending()
+
+    results["animate"] = measure(animate, repeats)
+
+    def action():
+        top = monitor[0]
+        monitor.perform_action(next(iter(top.actions)), index=0)
+
+    results["action"] = measure(action, repeats)
+    talon_stubs.CRON.pending.clear()
+    talon_stubs.UI.fire("app_close", nc.app)
+    return results, dict(monitor.list_updates), len(monitor.notifications)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--windows", type=int, nargs="+", default=[1, 10])
+    parser.add_argument("--groups", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    talon_stubs.install()
+    notification = talon_stubs.load("notification")
+
+    print(
+        f"{'layout':<16} {'count':>5}  "
+        + "  ".join(f"{name + ' ms/trips/KiB':>24}" for name in RESULTS)
+        + "  list updates"
+    )
+    for role, uuids in LAYOUTS:
+        layout = f"{role}/{'UUID' if uuids else 'int'}"
+        for windows in args.windows:
+            for groups in args.groups:
+                results, list_updates, count = bench(
+                    notification, windows, groups, role, uuids, args.repeats
+                )
+                print(
+                    f"{layout:<16} {count:>5}  "
+                    + "  ".join(
+                        f"{ms:>10.3f}/{trips:>6.0f}/{kib:>6.0f}"
+                        for ms, trips, kib in (results[name] for name in RESULTS)
+                    )
+                    + f"  {list_updates}"
+                )
+
+
+RESULTS = ("cold", "rescan", "new", "animate", "action")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Synthetic menu bars, as macOS presents them through accessibility"""
+
+import random
+
+try:
+    from .talon_stubs import App, Element
+except ImportError:  # run as a script
+    from talon_stubs import App, Element
+
+WORDS = (
+    "new open close save export import print undo redo cut copy paste delete select "
+    "all find replace next previous show hide view window zoom enter full screen "
+    "sidebar toolbar tab move merge minimize bring front format font bold italic "
+    "underline bigger smaller align left right center justify insert image table "
+    "link comment page break document selection line spacing style heading list "
+    "bullet number check spelling grammar language preferences settings account "
+    "sync history bookmark reload stop developer tools console source code"
+).split()
+
+
+def menu_item(title: str, submenu=None, key=None, modifiers=0, enabled=True):
+    children = [Element(submenu, AXRole="AXMenu")] if submenu else []
+    return Element(
+        children,
+        AXRole="AXMenuItem",
+        AXTitle=title,
+        AXEnabled=enabled,
+        AXMenuItemCmdChar=key,
+        AXMenuItemCmdModifiers=modifiers if key else None,
+        AXMenuItemCmdGlyph=None,
+        AXMenuItemCmdVirtualKey=None,
+        AXMenuItemMarkChar=None,
+    )
+
+
+def separator():
+    return Element(AXRole="AXMenuItem", AXTitle="", AXEnabled=False)
+
+
+def menu_bar(menus: dict) -> Element:
+    """`menus`: menu bar title -> items"""
+    return Element(
+        [
+            Element(
+                [Element(items, AXRole="AXMenu")],
+                AXRole="AXMenuBarItem",
+                AXTitle=title,
+            )
+            for title, items in menus.items()
+        ],
+        AXRole="AXMenuBar",
+    )
+
+
+def synthetic_app(
+    menus=12,
+    items=40,
+    submenus=3,
+    submenu_items=15,
+    seed=0,
+    pid=42,
+    bundle="com.example",
+) -> App:
+    """An app with `menus` menus of `items` items, `submenus` of which in each menu
+    open submenus of `submenu_items` items; every fifth item has a key equivalent"""
+    rng = random.Random(seed)
+    keys = iter(rng.sample("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789", 36) * 1000)
+
+    def title():
+        return " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+
+    def item(n, submenu=None):
+        if n % 5 == 0 and submenu is None:
+            return menu_item(title(), key=next(keys), modifiers=n % 4)
+        return menu_item(title(), submenu=submenu)
+
+    bar = {}
+    for m in range(menus):
+        menu = []
+        for n in range(items):
+            if n % 10 == 9:
+                menu.append(separator())
+            submenu = None
+            if n < submenus:
+                submenu = [item(k + 1) for k in range(submenu_items)]
+            menu.append(item(n, submenu))
+        bar[f"{rng.choice(WORDS).title()} {m}"] = menu
+
+    return App(pid, bundle, [menu_bar(bar)])
+
+
+def leaf_paths(app: App) -> list[list[str]]:
+    """Returns the title paths of every actionable item in the app's menus"""
+    paths = []
+
+    def walk(element, path):
+        for menu in element._children:
+            for child in menu._children:
+                title = child.attributes.get("AXTitle")
+                if not title:
+                    continue
+                if child._children:
+                    walk(child, path + [title])
+                else:
+                    paths.append(path + [title])
+
+    for menu_bar_item in app.element._children[0]._children:
+        walk(menu_bar_item, [menu_bar_item.attributes["AXTitle"]])
+    return paths
@@ -0,0 +1,103 @@
+"""A synthetic Notification Center accessibility tree, as macOS presents it"""
+
+import types
+import uuid
+
+try:
+    from .talon_stubs import App, Element, Window
+except ImportError:  # run as a script
+    from talon_stubs import App, Element, Window
+
+BUNDLE = "com.apple.notificationcenterui"
+PID = 999
+
+APP_NAMES = ("Slack", "Mail", "Messages", "Calendar", "Reminders", "Discord")
+ACTION_NAMES = (
+    ("Reply", "Mark as Read"),
+    ("Archive", "Clear All"),
+    ("Don’t Allow", "Show"),
+)
+
+
+def notification_group(
+    identifier, y: int, app_name: str, role: str, actions=("Reply",)
+) -> Element:
+    return Element(
+        [
+            Element(AXIdentifier="title", AXValue=f"Title {identifier}"),
+            Element(AXIdentifier="subtitle", AXValue=None),
+            Element(AXIdentifier="body", AXValue=f"Body of notification {identifier}"),
+        ],
+        actions={
+            **{f"Name:{name}\nTarget:0x0\nSelector:(null)": name for name in actions},
+            "AXScrollToVisible": "scroll to visible",
+        },
+        AXRole=role,
+        AXIdentifier=str(identifier),
+        AXSubrole="AXNotificationCenterBanner",
+        AXDescription=app_name,
+        AXStackingIdentifier=f"{app_name}-stack",
+        AXFrame=types.SimpleNamespace(left=1200, top=y),
+    )
+
+
+class FakeNotificationCenter:
+    """`windows` windows of `groups` notifications each.
+
+    `role`: AXGroup (before macOS Sequoia) or AXButton (Sequoia)
+    `uuids`: whether identifiers are UUIDs (Sequoia) or integers
+    """
+
+    def __init__(self, windows: int, groups: int, role="AXGroup", uuids=False):
+        self.role = role
+        self.uuids = uuids
+        self.next_identifier = 1
+        self.app = App(PID, BUNDLE, name="Notification Center")
+        for window_id in range(1, windows + 1):
+            window = self.add_window(window_id)
+            for _ in range(groups):
+                self.add_group(window)
+
+    def identifier(self):
+        identifier = self.next_identifier
+        self.next_identifier += 1
+        return uuid.UUID(int=identifier) if self.uuids else identifier
+
+    def add_window(self, window_id) -> Window:
+        window = Window(window_id, self.app)
+        self.app.window_list.append(window)
+        return window
+
+    def add_group(self, window: Window) -> Element:
+        identifier = self.identifier()
+        n = self.next_identifier
+        group = notification_group(
+            identifier,
+            y=len(window.element._children) * 80 + window.id * 10000,
+            app_name=APP_NAMES[n % len(APP_NAMES)],
+            role=self.role,
+            actions=ACTION_NAMES[n % len(ACTION_NAMES)],
+        )
+        window.element._children.append(group)
+        return group
+
+    def remove_window(self, window: Window):
+        self.app.window_list.remove(window)
+
+
+class FakeWindowEvents:
+    """An event source for `NotificationMonitor` (see `WindowEvents`) that reports
+    only what it is told to, with `emit`"""
+
+    def __init__(self):
+        self.callback = None
+
+    def subscribe(self, callback):
+        self.callback = callback
+
+    def unsubscribe(self):
+        self.callback = None
+
+    def emit(self, kind: str, window: Window):
+        if self.callback is not None:
+            self.callback(kind, window)
@@ -0,0 +1,308 @@
+"""Just enough of Talon's API to run this repository's modules outside Talon (e.g. on
+Linux), against fake accessibility trees, for the benchmarks in this directory.
+
+`install()` must be called before `load()`ing any module. Every accessibility
+call made through a fake `Element` is counted in `Element.round_trips`, since
+in Talon each is a round trip to the application.
+"""
+
+import importlib
+import os
+import sys
+import tempfile
+import types
+
+REPOSITORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "axkit"
+
+
+class UIErr(Exception):
+    pass
+
+
+class Registry:
+    """Event registration, as `ui.register`/`app.register`; `fire` stands in for Talon"""
+
+    def __init__(self):
+        self.handlers = {}
+
+    def register(self, event, handler):
+        self.handlers.setdefault(event, []).append(handler)
+
+    def unregister(self, event, handler):
+        self.handlers.get(event, []).remove(handler)
+
+    def fire(self, event, *args):
+        for handler in list(self.handlers.get(event, [])):
+            handler(*args)
+
+
+class Children(list):
+    def find(self, max_depth=None, **attributes):
+        found = []
+
+        def walk(elements, depth):
+            for element in elements:
+                if all(
+                    element.get(name) == value for name, value in attributes.items()
+                ):
+                    found.append(element)
+                if max_depth is None or depth < max_depth:
+                    walk(element.children, depth + 1)
+
+        walk(self, 0)
+        return found
+
+    def find_one(self, max_depth=None, **attributes):
+        if not (found := self.find(max_depth, **attributes)):
+            raise UIErr("no such element")
+        return found[0]
+
+
+class Element:
+    """A fake accessibility element.
+
+    Attributes are passed as keyword arguments; parameterized attributes (e.g.
+    AXStringForRange) as functions of the parameter.
+    """
+
+    round_trips = 0
+
+    def __init__(self, children=(), actions=None, **attributes):
+        object.__setattr__(self, "attributes", attributes)
+        object.__setattr__(self, "_children", Children(children))
+        object.__setattr__(self, "_actions", dict(actions or {}))
+        object.__setattr__(self, "performed", [])
+
+    @property
+    def children(self):
+        Element.round_trips += 1
+        return self._children
+
+    def get(self, name, param=None):
+        Element.round_trips += 1
+        if name == "AXChildren":
+            return list(self._children)
+        value = self.attributes.get(name)
+        if param is not None:
+            return None if value is None else value(param)
+        return value
+
+    def __getattr__(self, name):
+        if not name.startswith("AX"):
+            raise AttributeError(name)
+        Element.round_trips += 1
+        if name == "AXChildren":
+            return list(self._children)
+        try:
+            return self.attributes[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name, value):
+        Element.round_trips += 1
+        self.attributes[name] = value
+
+    @property
+    def attrs(self):
+        return list(self.attributes)
+
+    @property
+    def parameterized_attrs(self):
+        return [name for name, value in self.attributes.items() if callable(value)]
+
+    @property
+    def actions(self):
+        Element.round_trips += 1
+        return dict(self._actions)
+
+    def perform(self, action):
+        Element.round_trips += 1
+        self.performed.append(action)
+
+    def dump(self):
+        return dict(self.attributes)
+
+
+class Window:
+    def __init__(self, id, app, children=()):
+        self.id = id
+        self.app = app
+        self.element = Element(children, AXRole="AXWindow")
+
+    @property
+    def children(self):
+        return self.element.children
+
+
+class App:
+    def __init__(self, pid, bundle, children=(), name=None):
+        self.pid = pid
+        self.bundle = bundle
+        self.name = name or bundle
+        self.element = Element(children, AXRole="AXApplication")
+        self.window_list = []
+
+    @property
+    def children(self):
+        return self.element.children
+
+    def windows(self):
+        return list(self.window_list)
+
+
+class Span:
+    def __init__(self, a, b):
+        self.a = a
+        self.b = b
+
+    left = property(lambda self: self.a)
+    right = property(lambda self: self.b)
+
+    def __eq__(self, other):
+        return isinstance(other, Span) and (self.a, self.b) == (other.a, other.b)
+
+    def __repr__(self):
+        return f"Span({self.a}, {self.b})"
+
+
+class Settings(dict):
+    def get(self, name, default=None):
+        return super().get(name, default)
+
+
+class Module:
+    def __init__(self):
+        self.apps = types.SimpleNamespace()
+
+    def setting(self, name, type=None, default=None, desc=None):
+        SETTINGS.setdefault(f"user.{name}", default)
+
+    def list(self, name, desc=None):
+        pass
+
+    def action_class(self, cls):
+        return cls
+
+
+class Context:
+    def __init__(self):
+        self.lists = {}
+        self.matches = ""
+
+    def action_class(self, path):
+        return lambda cls: cls
+
+
+class Cron:
+    """Runs jobs only when asked to, with `run_pending`"""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, delay, callback):
+        job = [callback]
+        self.pending.append(job)
+        return job
+
+    def interval(self, delay, callback):
+        return self.after(delay, callback)
+
+    def cancel(self, job):
+        if job in self.pending:
+            self.pending.remove(job)
+
+    def run_pending(self):
+        pending, self.pending = self.pending, []
+        for (callback,) in pending:
+            callback()
+
+
+class GUI:
+    def __init__(self, draw):
+        self.draw = draw
+        self.showing = False
+
+    def show(self):
+        self.showing = True
+
+    def hide(self):
+        self.showing = False
+
+
+def create_spoken_forms_from_list(sources, words_to_exclude=None):
+    """Crude stand-in for knausj's action of the same name"""
+    return {source.lower(): source for source in sources}
+
+
+SETTINGS = Settings()
+CRON = Cron()
+UI = Registry()
+APP = Registry()
+
+
+def install():
+    """Makes `import talon` (and `talon.ui`, `talon.types`) import these stubs"""
+    talon = types.ModuleType("talon")
+    ui = types.ModuleType("talon.ui")
+    for name, value in {
+        "register": UI.register,
+        "unregister": UI.unregister,
+        "fire": UI.fire,
+        "UIErr": UIErr,
+        "Element": Element,
+        "Window": Window,
+        "App": App,
+        "running": [],
+        "active": None,
+        "focused": None,
+    }.items():
+        setattr(ui, name, value)
+    ui.apps = lambda pid=None, bundle=None: [
+        app
+        for app in ui.running
+        if (pid is None or app.pid == pid) and (bundle is None or app.bundle == bundle)
+    ]
+    ui.active_app = lambda: ui.active
+    ui.focused_element = lambda: ui.focused
+
+    talon_types = types.ModuleType("talon.types")
+    talon_types.Span = Span
+
+    user_dir = tempfile.mkdtemp(prefix="talon_user")
+    talon.Module = Module
+    talon.Context = Context
+    talon.ui = ui
+    talon.types = talon_types
+    talon.settings = SETTINGS
+    talon.cron = CRON
+    talon.app = APP
+    APP.notifications = []
+    APP.notify = lambda *args, **kwargs: APP.notifications.append(args)
+    APP.platform = "mac"
+    talon.actions = types.SimpleNamespace(
+        user=types.SimpleNamespace(
+            create_spoken_forms_from_list=create_spoken_forms_from_list
+        ),
+        path=types.SimpleNamespace(talon_user=lambda: user_dir),
+        insert=lambda text: None,
+        key=lambda keys: None,
+    )
+    talon.imgui = types.SimpleNamespace(
+        GUI=GUI, open=lambda **kwargs: (lambda draw: GUI(draw))
+    )
+    talon.clip = types.SimpleNamespace(set_text=lambda text: None)
+    talon.ctrl = types.SimpleNamespace()
+    talon.noise = Registry()
+
+    sys.modules.update({"talon": talon, "talon.ui": ui, "talon.types": talon_types})
+    return talon
+
+
+def load(name: str):
+    """Imports a module of this repository, e.g. "notification" or "dictation.dictation_context" """
+    if PACKAGE not in sys.modules:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [REPOSITORY]
+        sys.modules[PACKAGE] = package
+    return importlib.import_module(f"{PACKAGE}.{name}")
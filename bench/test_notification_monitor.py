@@ -0,0 +1,133 @@
+"""Checks how NotificationMonitor keeps track of notifications as windows come, go
+and trade notifications, against a synthetic Notification Center.
+
+    python -m pytest bench/test_notification_monitor.py
+"""
+
+import types
+
+try:
+    from . import talon_stubs
+    from .fake_notification_center import FakeNotificationCenter, FakeWindowEvents
+except ImportError:  # run by pytest from the repository
+    import talon_stubs
+    from fake_notification_center import FakeNotificationCenter, FakeWindowEvents
+
+talon = talon_stubs.install()
+notification = talon_stubs.load("notification")
+
+
+def app_names(monitor):
+    return {monitor.notifications[identifier].app_name for identifier in monitor.order}
+
+
+def action_names(monitor):
+    return {
+        action
+        for identifier in monitor.order
+        for action in monitor.notifications[identifier].actions
+    }
+
+
+def check(monitor, order, owners):
+    assert monitor.order == order
+    assert monitor.owners == owners
+    assert set(monitor.notifications) == set(order)
+    # every notification is listed under exactly the window that owns it
+    assert sorted(
+        (identifier, window_id)
+        for window_id, positions in monitor.windows.items()
+        for identifier in positions
+    ) == sorted(owners.items())
+    lists = notification.ctx.lists
+    assert set(lists["user.notification_apps"].values()) == app_names(monitor)
+    assert set(lists["user.notification_actions"].values()) == action_names(monitor)
+
+
+def move_group(identifier, source, destination):
+    """Moves a notification's group to the bottom of another window, as Notification
+    Center does when it regroups banners"""
+    group = next(
+        group
+        for group in source.element._children
+        if group.attributes["AXIdentifier"] == str(identifier)
+    )
+    source.element._children.remove(group)
+    group.attributes["AXFrame"] = types.SimpleNamespace(
+        left=1200, top=destination.id * 10000 + len(destination.element._children) * 80
+    )
+    destination.element._children.append(group)
+
+
+def test_windows_and_moves():
+    nc = FakeNotificationCenter(windows=1, groups=2)
+    talon.ui.running[:] = [nc.app]
+    notification.notification_group_role = None
+    notification.HISTORY = notification.NotificationHistory()
+    events = FakeWindowEvents()
+
+    monitor = notification.NotificationMonitor(nc.app, events=events)
+    first = nc.app.window_list[0]
+    check(monitor, [1, 2], {1: 1, 2: 1})
+
+    # a new window
+    second = nc.add_window(2)
+    nc.add_group(second)
+    events.emit("created", second)
+    check(monitor, [1, 2, 3], {1: 1, 2: 1, 3: 2})
+
+    # a notification moves between windows; the window it moved to reports first
+    move_group(2, first, second)
+    events.emit("changed", second)
+    talon_stubs.CRON.run_pending()
+    check(monitor, [1, 3, 2], {1: 1, 2: 2, 3: 2})
+
+    # then the window it left, which mustn't take it along
+    events.emit("changed", first)
+    talon_stubs.CRON.run_pending()
+    check(monitor, [1, 3, 2], {1: 1, 2: 2, 3: 2})
+
+    # the old window closes
+    nc.remove_window(first)
+    events.emit("destroyed", first)
+    check(monitor, [3, 2], {2: 2, 3: 2})
+
+    # a full rescan agrees, and picks up what no event reported
+    monitor.update_notifications()
+    check(monitor, [3, 2], {2: 2, 3: 2})
+    nc.add_group(second)
+    monitor.update_notifications()
+    check(monitor, [3, 2, 4], {2: 2, 3: 2, 4: 2})
+
+    talon_stubs.UI.fire("app_close", nc.app)
+
+
+def test_notification_in_two_windows():
+    """Mid-animation, one notification can be in two windows at once"""
+    nc = FakeNotificationCenter(windows=1, groups=1)
+    talon.ui.running[:] = [nc.app]
+    notification.notification_group_role = None
+    notification.HISTORY = notification.NotificationHistory()
+    events = FakeWindowEvents()
+
+    monitor = notification.NotificationMonitor(nc.app, events=events)
+    first = nc.app.window_list[0]
+    check(monitor, [1], {1: 1})
+
+    # the same notification shows up in a new window before leaving the old one
+    second = nc.add_window(2)
+    second.element._children.append(first.element._children[0])
+    events.emit("created", second)
+    check(monitor, [1], {1: 2})
+
+    # closing the window it was first seen in leaves it be
+    nc.remove_window(first)
+    events.emit("destroyed", first)
+    check(monitor, [1], {1: 2})
+
+    # closing the window it's now in removes it
+    nc.remove_window(second)
+    events.emit("destroyed", second)
+    check(monitor, [], {})
+
+    talon_stubs.UI.fire("app_close", nc.app)
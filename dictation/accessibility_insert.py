@@ -0,0 +1,155 @@
+from typing import Optional
+
+from talon import Context, Module, actions, settings, ui
+
+try:
+    from talon.ui import Element
+except ImportError:
+    Element = type(None)
+from talon.types import Span
+
+from ..ax import get_attributes
+from .dictation_context import CONTEXT_CACHE, Colors, selection_bounds
+from .dictation_profile import PROFILES
+
+mod = Module()
+mod.setting(
+    "accessibility_dictation_insert",
+    type=bool,
+    default=False,
+    desc="In dictation mode, insert dictated phrases by setting them directly on the text field through accessibility, instead of typing them.",
+)
+
+ctx = Context()
+ctx.matches = r"""
+os: mac
+mode: dictation
+"""
+
+
+def string_for_range(el: Element, start: int, end: int) -> Optional[str]:
+    """Returns the element's text between `start` and `end`, or None if the
+    application won't tell us"""
+    try:
+        return el.get("AXStringForRange", Span(start, end))
+    except ui.UIErr:
+        return None
+
+
+def insert_directly(el: Element, text: str) -> bool:
+    """Replaces the element's selection with `text` through accessibility, returning
+    whether we could confirm that it worked"""
+    if not el or not text:
+        return False
+
+    try:
+        selection, length = get_attributes(
+            el, ("AXSelectedTextRange", "AXNumberOfCharacters")
+        )
+        # without a length, we can't tell whether setting the text did anything
+        if length is None:
+            return False
+
+        el.AXSelectedText = text
+        new_length = el.get("AXNumberOfCharacters")
+    except ui.UIErr:
+        return False
+
+    left, right = selection_bounds(selection)
+    caret = left + len(text)
+
+    if new_length is None:
+        # only the text itself can tell us whether it was written; if it can't,
+        # typing the text again risks less than losing it
+        if string_for_range(el, left, caret) != text:
+            CONTEXT_CACHE.clear()
+            return False
+    elif new_length != length + len(text) - (right - left):
+        if new_length == length:
+            # the application ignored us
+            return False
+
+        # something happened, but not what we expected; don't type it again
+        print(
+            f"{Colors.YELLOW.value}Unexpected result inserting through accessibility{Colors.RESET.value}: {length} characters became {new_length}"
+        )
+        CONTEXT_CACHE.clear()
+        return True
+    elif right - left == len(text):
+        # replacing a selection of the same length doesn't change the length, so
+        # check the text itself where the application lets us
+        written = string_for_range(el, left, caret)
+        if written is not None and written != text:
+            # the application ignored us
+            return False
+
+    try:
+        # some applications select what was inserted rather than moving the cursor
+        # past it
+        if selection_bounds(el.get("AXSelectedTextRange")) != (caret, caret):
+            el.AXSelectedTextRange = Span(caret, caret)
+    except ui.UIErr:
+        # the text is in, but we no longer know where the cursor is
+        CONTEXT_CACHE.clear()
+        return True
+
+    # unless knausj's dictation_insert already told the cache about this text
+    if (
+        el == CONTEXT_CACHE.element
+        and (left, right) == CONTEXT_CACHE.selection
+        and length == CONTEXT_CACHE.length
+    ):
+        CONTEXT_CACHE.inserted(text)
+
+    return True
+
+
+@mod.action_class
+class Actions:
+    def accessibility_insert(text: str) -> bool:
+        """Inserts text into the current text field through accessibility, typing it if that doesn't work. Returns whether accessibility was used."""
+        if insert_directly(actions.user.dictation_current_element(), text):
+            return True
+
+        actions.insert(text)
+        return False
+
+
+# The phrase knausj's dictation_insert announced it is about to insert, so that only
+# dictated phrases are inserted through accessibility, not the text of other
+# commands (e.g. "new line", which should press Return in a chat field)
+pending_phrase = None
+
+
+def should_insert_directly(text: str) -> bool:
+    global pending_phrase
+
+    phrase, pending_phrase = pending_phrase, None
+    return (
+        text == phrase
+        and settings.get("user.accessibility_dictation_insert")
+        # typing these presses keys that applications often treat specially
+        and "\n" not in text
+        and "\t" not in text
+        and not PROFILES.disabled(ui.active_app().bundle)
+    )
+
+
+@ctx.action_class("user")
+class UserActions:
+    def add_phrase_to_history(text: str):
+        global pending_phrase
+
+        actions.next(text)
+        pending_phrase = text
+
+
+@ctx.action_class("main")
+class MainActions:
+    def insert(text: str):
+        if should_insert_directly(text) and insert_directly(
+            actions.user.dictation_current_element(), text
+        ):
+            return
+
+        actions.next(text)
@@ -1,3 +1,5 @@
+from collections import deque
+
 from talon import Context, Module, ui
 
 ctx = Context()
@@ -31,6 +33,55 @@ app: office_mac
 """
 
 
+# Limits on the search for the text area within a container
+MAX_SEARCH_DEPTH = 8
+MAX_SEARCH_ELEMENTS = 1000
+
+# (window, container, text area) most recently found, most recent first
+TEXT_AREAS = deque(maxlen=16)
+
+
+def has_selection(textarea) -> bool:
+    try:
+        return textarea.AXSelectedTextRange.left is not None  # NSNotFound
+    except (AttributeError, ui.UIErr):
+        return False
+
+
+def find_text_area(container):
+    """Breadth-first search for the text area with the selection, nearest first"""
+    level = list(container.children)
+    searched = 0
+    for _ in range(MAX_SEARCH_DEPTH):
+        next_level = []
+        for el in level:
+            if el.get("AXRole") == "AXTextArea" and has_selection(el):
+                return el
+            searched += 1
+            if searched >= MAX_SEARCH_ELEMENTS:
+                return None
+            next_level.extend(el.children)
+        if not next_level:
+            break
+        level = next_level
+    return None
+
+
+def text_area_in(container):
+    window = container.get("AXWindow")
+    for entry in TEXT_AREAS:
+        cached_window, cached_container, textarea = entry
+        if cached_container == container and cached_window == window:
+            if has_selection(textarea):
+                return textarea
+            TEXT_AREAS.remove(entry)
+            break
+
+    if (textarea := find_text_area(container)) is not None:
+        TEXT_AREAS.appendleft((window, container, textarea))
+    return textarea
+
+
 @ctx.action_class("user")
 class UserActions:
     def dictation_current_element():
@@ -43,6 +94,4 @@ class UserActions:
         elif (role == "AXScrollArea") or (  # Outlook, PowerPoint
             role == "AXSplitGroup" and el.get("AXIdentifier") == "Document Pane"  # Word
         ):
-            for textarea in el.children.find(AXRole="AXTextArea"):
-                if textarea.AXSelectedTextRange.left is not None:  # NSNotFound
-                    return textarea
+            return text_area_in(el)
@@ -1,5 +1,6 @@
+import time
 import traceback
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from enum import Enum
 from typing import Optional
 
@@ -11,6 +12,9 @@ except ImportError:
     Element = type(None)
 from talon.types import Span
 
+from ..ax import get_attributes
+from .dictation_profile import PROFILES, TIMINGS
+
 ctx = Context()
 ctx.matches = "os: mac"
 
@@ -21,6 +25,12 @@ mod.setting(
     default=False,
     desc="Use accessibility APIs to implement context aware dictation.",
 )
+mod.setting(
+    "accessibility_dictation_windowed_reads",
+    type=bool,
+    default=False,
+    desc="For accessibility dictation, read only the text around the cursor rather than the entire contents of the text field, where the application supports it. Faster in long documents.",
+)
 
 # Default number of characters to use to acquire context. Somewhat arbitrary.
 # The current dictation formatter doesn't need very many, but that could change in the future.
@@ -33,16 +43,41 @@ class AccessibilityContext:
 
     content: str
     selection: Span
+    # Where `content` starts in the buffer, if it is only a window around the selection
+    # (in which case no more than DEFAULT_CONTEXT_CHARACTERS of context are available)
+    offset: int = 0
 
     def left_context(self, num_chars: int = DEFAULT_CONTEXT_CHARACTERS) -> str:
         """Returns `num_chars`' worth of context to the left of the cursor"""
-        start = max(0, self.selection.left - num_chars)
-        return self.content[start : self.selection.left]
+        start = max(self.offset, self.selection.left - num_chars)
+        return self.content[start - self.offset : self.selection.left - self.offset]
 
     def right_context(self, num_chars: int = DEFAULT_CONTEXT_CHARACTERS) -> str:
         """Returns `num_chars`' worth of context to the right of the cursor"""
-        end = min(self.selection.right + num_chars, len(self.content))
-        return self.content[self.selection.right : end]
+        end = min(self.selection.right + num_chars, self.offset + len(self.content))
+        return self.content[self.selection.right - self.offset : end - self.offset]
+
+
+def read_window(
+    el: Element, selection: Span, num_chars: int = DEFAULT_CONTEXT_CHARACTERS
+) -> Optional[tuple[str, int]]:
+    """Reads the text within `num_chars` of the selection with AXStringForRange, returning
+    it and where it starts, or None if the element doesn't support reading ranges"""
+    try:
+        length = el.get("AXNumberOfCharacters")
+        if length is None:
+            return None
+
+        start = max(0, selection.left - num_chars)
+        end = min(selection.right + num_chars, length)
+        content = el.get("AXStringForRange", Span(start, end))
+    except ui.UIErr:
+        return None
+
+    if content is None:
+        return None
+
+    return content, start
 
 
 @mod.action_class
@@ -86,18 +121,38 @@ class ModActions:
         # NOTE(pcohen): In Microsoft apps (Word, OneNote), selection will be none when the cursor
         # is that the start of the input buffer.
         # TODO(pcohen): this should probably be an app-specific `accessibility_adjust_context_for_application`
-        selection = el.get("AXSelectedTextRange")
+        with TIMINGS.span("AXSelectedTextRange"):
+            selection = el.get("AXSelectedTextRange")
         if selection is None:
             selection = Span(0, 0)
 
         # Find the portion of the range represented by AXValue, if any (e.g., current page of document)
-        if shared_range := el.get("AXSharedCharacterRange"):
+        window = None
+        with TIMINGS.span("AXSharedCharacterRange"):
+            shared_range = el.get("AXSharedCharacterRange")
+        if shared_range:
+            # AXValue is already partial here, and ranges may not line up with it
             selection = Span(selection.a - shared_range.a, selection.b - shared_range.a)
+        elif settings.get("user.accessibility_dictation_windowed_reads"):
+            with TIMINGS.span("AXStringForRange"):
+                window = read_window(el, selection)
+
+        if window is not None:
+            content, offset = window
+        else:
+            with TIMINGS.span("AXValue"):
+                content, offset = el.get("AXValue"), 0
+            TIMINGS.value_missing = content is None
 
-        context = AccessibilityContext(content=el.get("AXValue"), selection=selection)
+        context = AccessibilityContext(
+            content=content, selection=selection, offset=offset
+        )
 
         # Support application-specific overrides:
-        context = actions.user.accessibility_adjust_context_for_application(el, context)
+        with TIMINGS.span("accessibility_adjust_context_for_application"):
+            context = actions.user.accessibility_adjust_context_for_application(
+                el, context
+            )
 
         # If we don't appear to have any accessibility information, don't use it.
         if context.content is None or context.selection is None:
@@ -106,6 +161,79 @@ class ModActions:
         return context
 
 
+def selection_bounds(selection: Optional[Span]) -> tuple[int, int]:
+    # As above, Microsoft apps report no selection at the start of the buffer
+    if selection is None:
+        return 0, 0
+    return selection.left, selection.right
+
+
+class ContextCache:
+    """The dictation context of the element last dictated into, updated locally as we
+    insert into it so that it needn't be fetched in full for every phrase"""
+
+    __slots__ = ("element", "context", "selection", "length")
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.element = None
+        self.context = None
+        # AXSelectedTextRange and AXNumberOfCharacters we expect the element to have
+        self.selection = None
+        self.length = None
+
+    def get(self, el: Element) -> Optional[AccessibilityContext]:
+        """Returns the dictation context for the element, only creating it anew if the
+        element has changed other than by our insertions"""
+        with TIMINGS.span("validate cached context"):
+            selection, length = get_attributes(
+                el, ("AXSelectedTextRange", "AXNumberOfCharacters")
+            )
+        selection = selection_bounds(selection)
+
+        if (
+            el == self.element
+            and selection == self.selection
+            and length is not None
+            and length == self.length
+        ):
+            return self.context
+
+        context = actions.user.accessibility_create_dictation_context(el)
+        # without a length, we can't tell if the text changed under an unmoved cursor
+        if context is None or length is None:
+            self.clear()
+        else:
+            self.element = el
+            self.context = context
+            self.selection = selection
+            self.length = length
+        return context
+
+    def inserted(self, text: str):
+        """Records that `text` was inserted over the selection in the cached element"""
+        if (context := self.context) is None:
+            return
+
+        selection = context.selection
+        start, end = selection.left - context.offset, selection.right - context.offset
+        caret = selection.left + len(text)
+        self.context = replace(
+            context,
+            content=context.content[:start] + text + context.content[end:],
+            selection=Span(caret, caret),
+        )
+
+        left, right = self.selection
+        self.selection = (left + len(text), left + len(text))
+        self.length += len(text) - (right - left)
+
+
+CONTEXT_CACHE = ContextCache()
+
+
 # TODO(pcohen): relocate this
 class Colors(Enum):
     RESET = "\033[0m"
@@ -113,36 +241,61 @@ class Colors(Enum):
     YELLOW = "\033[33m"
 
 
+def accessibility_peek(left, right) -> Optional[tuple[Optional[str], Optional[str]]]:
+    """Returns the text before and/or after the cursor, or None if accessibility can't tell us"""
+    before, after = None, None
+
+    try:
+        el = actions.user.dictation_current_element()
+        context = CONTEXT_CACHE.get(el) if el else None
+        if context is None:
+            print(
+                f"{Colors.YELLOW.value}Accessibility not available for context-aware dictation{Colors.RESET.value}; falling back to cursor method"
+            )
+            return None
+
+        if left:
+            before = context.left_context()
+        if right:
+            after = context.right_context()
+    except Exception as e:
+        print(
+            f"{Colors.RED.value}{type(e).__name__} while querying accessibility for context-aware dictation:{Colors.RESET.value} '{e}':"
+        )
+        traceback.print_exc()
+        return None
+
+    return before, after
+
+
 @ctx.action_class("self")
 class Actions:
     """Wires this into the knausj dictation formatter"""
 
     def dictation_peek(left, right):
-        before, after = None, None
-
-        try:
-            if not settings.get("user.accessibility_dictation"):
-                return actions.next(left, right)
-
-            el = actions.user.dictation_current_element()
-            context = actions.user.accessibility_create_dictation_context(el)
-            if context is None:
-                print(
-                    f"{Colors.YELLOW.value}Accessibility not available for context-aware dictation{Colors.RESET.value}; falling back to cursor method"
-                )
-                return actions.next(left, right)
-
-            if left:
-                before = context.left_context()
-            if right:
-                after = context.right_context()
-        except Exception as e:
-            print(
-                f"{Colors.RED.value}{type(e).__name__} while querying accessibility for context-aware dictation:{Colors.RESET.value} '{e}':"
-            )
-            traceback.print_exc()
-
-            # Fallback to the original (keystrokes) knausj method.
+        if not settings.get("user.accessibility_dictation"):
             return actions.next(left, right)
 
-        return before, after
+        bundle = ui.active_app().bundle
+        attempted = not PROFILES.disabled(bundle)
+        start = time.perf_counter()
+
+        if attempted:
+            TIMINGS.reset()
+            if (peeked := accessibility_peek(left, right)) is not None:
+                PROFILES.record(bundle, time.perf_counter() - start, succeeded=True)
+                return peeked
+
+        # Fallback to the original (keystrokes) knausj method.
+        fallback_start = time.perf_counter()
+        peeked = actions.next(left, right)
+        end = time.perf_counter()
+        PROFILES.record_fallback(bundle, end - fallback_start)
+        if attempted:
+            PROFILES.record(bundle, end - start, succeeded=False)
+        return peeked
+
+    def add_phrase_to_history(text: str):
+        # knausj's dictation_insert calls this with exactly what it is about to insert
+        actions.next(text)
+        CONTEXT_CACHE.inserted(text)
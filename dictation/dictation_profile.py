@@ -0,0 +1,252 @@
+import json
+import os
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from talon import Module, actions, app, cron, settings
+
+mod = Module()
+mod.setting(
+    "accessibility_dictation_auto_disable",
+    type=bool,
+    default=True,
+    desc="Stop using accessibility dictation in applications where it is consistently slower than the cursor method, until user.accessibility_dictation_profile_reset() is called.",
+)
+
+# Number of phrases to remember timings for, per application
+SAMPLES = 100
+# Number of phrases to see before deciding an application is too slow
+MIN_SAMPLES = 20
+# Give the disk a rest between phrases
+SAVE_DELAY = "10s"
+
+
+def percentile(samples, fraction: float):
+    if not samples:
+        return None
+    samples = sorted(samples)
+    return samples[round(fraction * (len(samples) - 1))]
+
+
+class PhraseTimings:
+    """Time spent in each accessibility call while working out one phrase's context"""
+
+    __slots__ = ("spans", "value_missing")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.spans = []  # (name, seconds)
+        self.value_missing = False
+
+    @contextmanager
+    def span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, time.perf_counter() - start))
+
+
+TIMINGS = PhraseTimings()
+
+
+class AppProfile:
+    """How accessibility dictation has fared in one application"""
+
+    __slots__ = (
+        "attempts",
+        "successes",
+        "value_missing",
+        "latencies",
+        "fallback_latencies",
+        "calls",
+        "disabled",
+    )
+
+    def __init__(self):
+        self.attempts = 0
+        self.successes = 0
+        self.value_missing = 0  # phrases where AXValue was None, like Messages
+        # seconds per phrase using accessibility (plus the cursor method, if it failed)
+        self.latencies = deque(maxlen=SAMPLES)
+        # seconds per phrase using the cursor method alone
+        self.fallback_latencies = deque(maxlen=SAMPLES)
+        self.calls = {}  # call name -> [count, total seconds]
+        self.disabled = False
+
+    def record(self, seconds: float, succeeded: bool, timings: PhraseTimings):
+        self.attempts += 1
+        self.successes += succeeded
+        self.value_missing += timings.value_missing
+        self.latencies.append(seconds)
+        for name, call_seconds in timings.spans:
+            call = self.calls.setdefault(name, [0, 0.0])
+            call[0] += 1
+            call[1] += call_seconds
+
+    def summary(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "success rate": self.successes / self.attempts if self.attempts else None,
+            "AXValue missing": self.value_missing,
+            "p50 ms": milliseconds(percentile(self.latencies, 0.5)),
+            "p95 ms": milliseconds(percentile(self.latencies, 0.95)),
+            "cursor method p50 ms": milliseconds(
+                percentile(self.fallback_latencies, 0.5)
+            ),
+            "mean ms per call": {
+                name: milliseconds(total / count)
+                for name, (count, total) in self.calls.items()
+            },
+            "disabled": self.disabled,
+        }
+
+    def to_json(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "successes": self.successes,
+            "value_missing": self.value_missing,
+            "latencies": list(self.latencies),
+            "fallback_latencies": list(self.fallback_latencies),
+            "calls": self.calls,
+            "disabled": self.disabled,
+        }
+
+    @staticmethod
+    def from_json(data: dict) -> "AppProfile":
+        profile = AppProfile()
+        profile.attempts = data["attempts"]
+        profile.successes = data["successes"]
+        profile.value_missing = data["value_missing"]
+        profile.latencies.extend(data["latencies"])
+        profile.fallback_latencies.extend(data["fallback_latencies"])
+        profile.calls = data["calls"]
+        profile.disabled = data["disabled"]
+        return profile
+
+
+def milliseconds(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+class DictationProfiles:
+    """Per-application profiles, saved to the Talon user directory"""
+
+    __slots__ = ("profiles", "fallback_latencies", "path", "save_job")
+
+    def __init__(self):
+        self.profiles = {}  # bundle -> AppProfile
+        # the cursor method takes about as long anywhere, so pool it across apps
+        self.fallback_latencies = deque(maxlen=SAMPLES)
+        self.path = None
+        self.save_job = None
+
+    def __getitem__(self, bundle: str) -> AppProfile:
+        if (profile := self.profiles.get(bundle)) is None:
+            profile = self.profiles[bundle] = AppProfile()
+        return profile
+
+    def load(self):
+        self.path = os.path.join(
+            actions.path.talon_user(), "accessibility_dictation_profile.json"
+        )
+        try:
+            with open(self.path, encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            # start over rather than fail to start; the file is replaced on next save
+            print(f"Ignoring unreadable {self.path}: {e}")
+            return
+
+        if not isinstance(data, dict):
+            print(f"Ignoring unreadable {self.path}: not a JSON object")
+            return
+
+        for bundle, profile in data.items():
+            try:
+                profile = AppProfile.from_json(profile)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Ignoring unreadable profile for {bundle} in {self.path}: {e!r}")
+                continue
+            self.profiles[bundle] = profile
+            self.fallback_latencies.extend(profile.fallback_latencies)
+
+    def disabled(self, bundle: str) -> bool:
+        """Returns whether accessibility dictation is turned off in the app for being
+        slow: until its profile is reset, and only while auto-disabling is on"""
+        profile = self.profiles.get(bundle)
+        return (
+            profile is not None
+            and profile.disabled
+            and settings.get("user.accessibility_dictation_auto_disable")
+        )
+
+    def record(self, bundle: str, seconds: float, succeeded: bool):
+        profile = self[bundle]
+        profile.record(seconds, succeeded, TIMINGS)
+        self.check(bundle, profile)
+        self.changed()
+
+    def record_fallback(self, bundle: str, seconds: float):
+        self[bundle].fallback_latencies.append(seconds)
+        self.fallback_latencies.append(seconds)
+        self.changed()
+
+    def check(self, bundle: str, profile: AppProfile):
+        if profile.disabled or not settings.get(
+            "user.accessibility_dictation_auto_disable"
+        ):
+            return
+        if len(profile.latencies) < MIN_SAMPLES:
+            return
+
+        fallback_latencies = profile.fallback_latencies
+        if len(fallback_latencies) < MIN_SAMPLES:
+            fallback_latencies = self.fallback_latencies
+        if len(fallback_latencies) < MIN_SAMPLES:
+            return
+
+        if percentile(profile.latencies, 0.5) > percentile(fallback_latencies, 0.5):
+            profile.disabled = True
+            print(
+                f"Accessibility dictation is slower than the cursor method in {bundle}; no longer using it there (until user.accessibility_dictation_profile_reset())"
+            )
+
+    def changed(self):
+        if self.path is not None and self.save_job is None:
+            self.save_job = cron.after(SAVE_DELAY, self.save)
+
+    def save(self):
+        self.save_job = None
+        data = {bundle: profile.to_json() for bundle, profile in self.profiles.items()}
+        # so that quitting Talon partway through can't leave a truncated file
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            json.dump(data, file)
+        os.replace(temporary_path, self.path)
+
+
+PROFILES = DictationProfiles()
+app.register("ready", PROFILES.load)
+
+
+@mod.action_class
+class Actions:
+    def accessibility_dictation_profile_show():
+        """Prints how accessibility dictation has fared in each application to the Talon log"""
+        for bundle, profile in sorted(PROFILES.profiles.items()):
+            print(bundle, profile.summary())
+
+    def accessibility_dictation_profile_reset(bundle: str = ""):
+        """Forgets how accessibility dictation has fared in the specified application (by default, all of them), re-enabling it there if it was disabled"""
+        if bundle:
+            PROFILES.profiles.pop(bundle, None)
+        else:
+            PROFILES.profiles.clear()
+            PROFILES.fallback_latencies.clear()
+        PROFILES.changed()
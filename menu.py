@@ -1,6 +1,11 @@
 import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
 
-from talon import Module, app, clip, ctrl, ui
+from talon import Module, actions, app, clip, ctrl, ui
+
+from .ax import get_attributes
 
 mod = Module()
 
@@ -217,6 +222,71 @@ kVK_JIS_Eisu = 0x66
 kVK_JIS_Kana = 0x68
 
 VK_NAMES = {
+    kVK_ANSI_A: "a",
+    kVK_ANSI_S: "s",
+    kVK_ANSI_D: "d",
+    kVK_ANSI_F: "f",
+    kVK_ANSI_H: "h",
+    kVK_ANSI_G: "g",
+    kVK_ANSI_Z: "z",
+    kVK_ANSI_X: "x",
+    kVK_ANSI_C: "c",
+    kVK_ANSI_V: "v",
+    kVK_ANSI_B: "b",
+    kVK_ANSI_Q: "q",
+    kVK_ANSI_W: "w",
+    kVK_ANSI_E: "e",
+    kVK_ANSI_R: "r",
+    kVK_ANSI_Y: "y",
+    kVK_ANSI_T: "t",
+    kVK_ANSI_1: "1",
+    kVK_ANSI_2: "2",
+    kVK_ANSI_3: "3",
+    kVK_ANSI_4: "4",
+    kVK_ANSI_6: "6",
+    kVK_ANSI_5: "5",
+    kVK_ANSI_Equal: "=",
+    kVK_ANSI_9: "9",
+    kVK_ANSI_7: "7",
+    kVK_ANSI_Minus: "-",
+    kVK_ANSI_8: "8",
+    kVK_ANSI_0: "0",
+    kVK_ANSI_RightBracket: "]",
+    kVK_ANSI_O: "o",
+    kVK_ANSI_U: "u",
+    kVK_ANSI_LeftBracket: "[",
+    kVK_ANSI_I: "i",
+    kVK_ANSI_P: "p",
+    kVK_ANSI_L: "l",
+    kVK_ANSI_J: "j",
+    kVK_ANSI_Quote: "'",
+    kVK_ANSI_K: "k",
+    kVK_ANSI_Semicolon: ";",
+    kVK_ANSI_Backslash: "\\",
+    kVK_ANSI_Comma: ",",
+    kVK_ANSI_Slash: "/",
+    kVK_ANSI_N: "n",
+    kVK_ANSI_M: "m",
+    kVK_ANSI_Period: ".",
+    kVK_ANSI_Grave: "`",
+    kVK_ANSI_KeypadDecimal: "keypad_decimal",
+    kVK_ANSI_KeypadMultiply: "keypad_multiply",
+    kVK_ANSI_KeypadPlus: "keypad_plus",
+    kVK_ANSI_KeypadClear: "keypad_clear",
+    kVK_ANSI_KeypadDivide: "keypad_divide",
+    kVK_ANSI_KeypadEnter: "keypad_enter",
+    kVK_ANSI_KeypadMinus: "keypad_minus",
+    kVK_ANSI_KeypadEquals: "keypad_equals",
+    kVK_ANSI_Keypad0: "keypad_0",
+    kVK_ANSI_Keypad1: "keypad_1",
+    kVK_ANSI_Keypad2: "keypad_2",
+    kVK_ANSI_Keypad3: "keypad_3",
+    kVK_ANSI_Keypad4: "keypad_4",
+    kVK_ANSI_Keypad5: "keypad_5",
+    kVK_ANSI_Keypad6: "keypad_6",
+    kVK_ANSI_Keypad7: "keypad_7",
+    kVK_ANSI_Keypad8: "keypad_8",
+    kVK_ANSI_Keypad9: "keypad_9",
     kVK_Return: "enter",
     kVK_Tab: "tab",
     kVK_Space: "space",
@@ -224,7 +294,7 @@ VK_NAMES = {
     kVK_Escape: "esc",
     # kVK_Command: '',
     # kVK_Shift: '',
-    # kVK_CapsLock: '',
+    kVK_CapsLock: "capslock",
     # kVK_Option: '',
     # kVK_Control: '',
     # kVK_RightCommand: '',
@@ -232,10 +302,10 @@ VK_NAMES = {
     # kVK_RightOption: '',
     # kVK_RightControl: '',
     # kVK_Function: '',
-    # kVK_F17: '',
-    # kVK_VolumeUp: '',
-    # kVK_VolumeDown: '',
-    # kVK_Mute: '',
+    kVK_F17: "f17",
+    kVK_VolumeUp: "volup",
+    kVK_VolumeDown: "voldown",
+    kVK_Mute: "mute",
     kVK_F18: "f18",
     kVK_F19: "f19",
     kVK_F20: "f20",
@@ -252,7 +322,7 @@ VK_NAMES = {
     kVK_F10: "f10",
     kVK_F12: "f12",
     kVK_F15: "f15",
-    # kVK_Help: '',
+    kVK_Help: "help",
     kVK_Home: "home",
     kVK_PageUp: "pageup",
     kVK_ForwardDelete: "delete",
@@ -273,9 +343,106 @@ VK_NAMES = {
     # kVK_JIS_Kana: '',
 }
 
+# Glyphs drawn in place of a key character, for keys that don't have one
+GLYPH_NAMES = {
+    kMenuTabRightGlyph: "tab",
+    kMenuTabLeftGlyph: "tab",
+    kMenuEnterGlyph: "keypad_enter",
+    # kMenuShiftGlyph: '',
+    # kMenuControlGlyph: '',
+    # kMenuOptionGlyph: '',
+    kMenuSpaceGlyph: "space",
+    kMenuDeleteRightGlyph: "delete",
+    kMenuReturnGlyph: "enter",
+    kMenuReturnR2LGlyph: "enter",
+    kMenuNonmarkingReturnGlyph: "enter",
+    # kMenuCommandGlyph: '',
+    kMenuDeleteLeftGlyph: "backspace",
+    kMenuEscapeGlyph: "esc",
+    kMenuClearGlyph: "keypad_clear",
+    kMenuPageUpGlyph: "pageup",
+    kMenuCapsLockGlyph: "capslock",
+    kMenuLeftArrowGlyph: "left",
+    kMenuRightArrowGlyph: "right",
+    kMenuNorthwestArrowGlyph: "home",
+    kMenuHelpGlyph: "help",
+    kMenuUpArrowGlyph: "up",
+    kMenuSoutheastArrowGlyph: "end",
+    kMenuDownArrowGlyph: "down",
+    kMenuPageDownGlyph: "pagedown",
+    # kMenuContextualMenuGlyph: '',
+    # kMenuPowerGlyph: '',
+    kMenuF1Glyph: "f1",
+    kMenuF2Glyph: "f2",
+    kMenuF3Glyph: "f3",
+    kMenuF4Glyph: "f4",
+    kMenuF5Glyph: "f5",
+    kMenuF6Glyph: "f6",
+    kMenuF7Glyph: "f7",
+    kMenuF8Glyph: "f8",
+    kMenuF9Glyph: "f9",
+    kMenuF10Glyph: "f10",
+    kMenuF11Glyph: "f11",
+    kMenuF12Glyph: "f12",
+    kMenuF13Glyph: "f13",
+    kMenuF14Glyph: "f14",
+    kMenuF15Glyph: "f15",
+    # kMenuEjectGlyph: '',
+    # kMenuEisuGlyph: '',
+    # kMenuKanaGlyph: '',
+    kMenuF16Glyph: "f16",
+    kMenuF17Glyph: "f17",
+    kMenuF18Glyph: "f18",
+    kMenuF19Glyph: "f19",
+    # kMenuMicrophoneGlyph: '',
+}
+
+
+def modifier_prefix(modifiers: int) -> str:
+    keys = []
+    if not (modifiers & kMenuNoCommandModifier):
+        keys.append("cmd")
+    if modifiers & kMenuShiftModifier:
+        keys.append("shift")
+    if modifiers & kMenuOptionModifier:
+        keys.append("alt")
+    if modifiers & kMenuControlModifier:
+        keys.append("ctrl")
+    if modifiers & kMenuFnGlobeModifier:
+        keys.append("fn")
+    return "".join(f"{key}-" for key in keys)
+
+
+# Talon modifier prefix (e.g. "cmd-shift-"), indexed by AXMenuItemCmdModifiers
+MODIFIER_PREFIXES = tuple(
+    modifier_prefix(modifiers) for modifiers in range(kMenuFnGlobeModifier << 1)
+)
+
+
+@lru_cache(maxsize=1024)
+def decode_key_equivalent(key_char, modifiers, glyph, virtual_key) -> Optional[str]:
+    """Returns a Talon key string for the given menu item attributes, or None if there
+    is no key equivalent or it isn't supported"""
+    # Prefer the virtual key to the glyph; e.g. "Num Lock" in Terminal has kVK_Escape
+    # but kMenuClearGlyph, and cmd-esc works fine to trigger it.
+    if key_char is not None:
+        key_name = key_char.lower()
+    elif not (
+        (key_name := VK_NAMES.get(virtual_key)) or (key_name := GLYPH_NAMES.get(glyph))
+    ):
+        return None
+
+    if modifiers is None:
+        return key_name
+    return f"{MODIFIER_PREFIXES[modifiers & (len(MODIFIER_PREFIXES) - 1)]}{key_name}"
+
+
+def menu_bar(app: ui.App):  # -> ui.Element
+    return app.children.find_one(AXRole="AXMenuBar", max_depth=0)
+
 
 def active_menu_bar():  # -> ui.Element
-    return ui.active_app().children.find_one(AXRole="AXMenuBar", max_depth=0)
+    return menu_bar(ui.active_app())
 
 
 def selected_menu_and_path():  # -> (ui.Element, str)
@@ -344,57 +511,39 @@ def selected_menu_path_strategy():
     return selected_menu, selected_menu_path, "Found selected"
 
 
-def menu_item_talon_key(menu_item):
-    """Returns a Talon key string for an AXMenuItem"""
-    key_char = menu_item.get("AXMenuItemCmdChar")
-    modifiers = menu_item.get("AXMenuItemCmdModifiers")
-    glyph = menu_item.get("AXMenuItemCmdGlyph")
-    virtual_key = menu_item.get("AXMenuItemCmdVirtualKey")
+KEY_EQUIVALENT_ATTRIBUTES = (
+    "AXMenuItemCmdChar",
+    "AXMenuItemCmdModifiers",
+    "AXMenuItemCmdGlyph",
+    "AXMenuItemCmdVirtualKey",
+)
 
-    keys = []
 
-    if modifiers is not None:
-        if not (modifiers & kMenuNoCommandModifier):
-            keys.append("cmd")
-        if modifiers & kMenuShiftModifier:
-            keys.append("shift")
-        if modifiers & kMenuOptionModifier:
-            keys.append("alt")
-        if modifiers & kMenuControlModifier:
-            keys.append("ctrl")
-        if modifiers & kMenuFnGlobeModifier:
-            keys.append("fn")
+def menu_item_talon_key(menu_item, quiet: bool = False):
+    """Returns a Talon key string for an AXMenuItem
 
-    got_key = False
+    `quiet`: don't notify when the item has no usable key equivalent
+    """
+    key_char, modifiers, glyph, virtual_key = get_attributes(
+        menu_item, KEY_EQUIVALENT_ATTRIBUTES
+    )
 
-    if key_char is not None:
-        keys.append(key_char.lower())
-        got_key = True
-
-    if not got_key and virtual_key is not None:
-        if key_name := VK_NAMES.get(virtual_key):
-            keys.append(key_name)
-            got_key = True
-
-    # XXX(nriley) consider accounting for glyphs in some cases
-    # Example: "Num Lock" in Terminal has kVK_Escape but kMenuClearGlyph
-    # However, cmd-esc works fine to trigger it
-
-    if not got_key:
-        no_key_message = []
-        if virtual_key is not None:
-            no_key_message.append(f"virtual key code {virtual_key:X}")
-        if glyph is not None:
-            no_key_message.append(f"glyph {glyph:X}")
-        if no_key_message:
-            print("Unsupported key with", ", ".join(no_key_message))
-            print(menu_item.dump())
-            app.notify("Key not supported", "\n".join(no_key_message))
-        else:
-            app.notify("Key not found")
-        return None
+    talon_key = decode_key_equivalent(key_char, modifiers, glyph, virtual_key)
+    if talon_key is not None or quiet:
+        return talon_key
 
-    return "-".join(keys)
+    no_key_message = []
+    if virtual_key is not None:
+        no_key_message.append(f"virtual key code {virtual_key:X}")
+    if glyph is not None:
+        no_key_message.append(f"glyph {glyph:X}")
+    if no_key_message:
+        print("Unsupported key with", ", ".join(no_key_message))
+        print(menu_item.dump())
+        app.notify("Key not supported", "\n".join(no_key_message))
+    else:
+        app.notify("Key not found")
+    return None
 
 
 def selected_menu_key_path_strategy():
@@ -412,6 +561,184 @@ def selected_menu_key_path_strategy():
     return talon_key, menu_path, strategy
 
 
+def menu_path_string(menu_path) -> str:
+    """Joins menu item titles into an escaped |-delimited menu path"""
+    return "|".join(
+        title.replace("\\", r"\\").replace("|", r"\|") for title in menu_path
+    )
+
+
+def menu_path_titles(menu_path: str) -> list[str]:
+    """Splits a |-delimited menu path into unescaped item titles"""
+    return [
+        item_title.replace(r"\\", "\\").replace(r"\|", "|")
+        for item_title in re.split(r"(?<=[^\\])\|", menu_path)
+    ]
+
+
+class MenuItemNotFound(Exception):
+    """Raised when a menu path can't be resolved; args are the notification title and body"""
+
+
+class MenuPathResolver:
+    """Resolves menu paths, resuming from the deepest menu shared with the paths resolved
+    before it, so selecting sibling items only searches the last menu again.
+    """
+
+    __slots__ = ("app_key", "titles", "menus")
+
+    def __init__(self):
+        self.app_key = None
+        self.titles = []  # titles of the last resolved path's ancestors
+        self.menus = []  # the AXMenu of the item at each `titles[: i + 1]`
+
+    def reset(self, *_):
+        self.titles.clear()
+        self.menus.clear()
+
+    def resolve(self, menu_path, quiet: bool = False):  # -> Optional[ui.Element]
+        """Returns the item of the active app's menus at the given path of titles
+
+        `quiet`: don't notify if there is no such item
+        """
+        active_app = ui.active_app()
+        if (app_key := (active_app.pid, active_app.bundle)) != self.app_key:
+            self.app_key = app_key
+            self.reset()
+
+        depth = 0
+        for resolved_title, item_title in zip(self.titles, menu_path[:-1]):
+            if resolved_title != item_title:
+                break
+            depth += 1
+        del self.titles[depth:], self.menus[depth:]
+
+        try:
+            try:
+                return self.resolve_from(depth, menu_path)
+            except (MenuItemNotFound, ui.UIErr):
+                if not depth:
+                    raise
+            # the menu we resumed from may have been rebuilt; try again from the top
+            self.reset()
+            return self.resolve_from(0, menu_path)
+        except MenuItemNotFound as e:
+            if not quiet:
+                app.notify(*e.args)
+            return None
+
+    def resolve_from(self, depth, menu_path):  # -> ui.Element
+        """Resolves the rest of the path, starting from the menu at `self.menus[depth - 1]`
+        (or from the menu bar if `depth` is 0)"""
+        menu_item = None
+        if not depth:
+            try:
+                menu_item = active_menu_bar().children.find_one(
+                    AXRole="AXMenuBarItem", AXTitle=menu_path[0]
+                )
+            except ui.UIErr:
+                raise MenuItemNotFound("Unable to locate menu to select", menu_path[0])
+            depth = 1
+
+        for item_title in menu_path[depth:]:
+            if menu_item is None:
+                menu = self.menus[-1]
+            else:
+                if len(menu_item.AXChildren) == 0:
+                    break
+                menu = menu_item.children[0]
+                self.titles.append(menu_path[len(self.titles)])
+                self.menus.append(menu)
+
+            try:
+                menu_item = menu.children.find_one(
+                    AXRole="AXMenuItem", AXTitle=item_title, max_depth=0
+                )
+            except ui.UIErr:
+                raise MenuItemNotFound(
+                    "Unable to locate menu item to select", item_title
+                )
+
+        if menu_item.AXTitle != menu_path[-1]:
+            raise MenuItemNotFound("Expected a submenu", menu_item.AXTitle)
+
+        return menu_item
+
+
+MENU_PATH_RESOLVER = MenuPathResolver()
+
+ui.register("app_activate", MENU_PATH_RESOLVER.reset)
+
+
+class MenuItemCache:
+    """Menu items previously resolved by `menu_select`, per app and escaped menu path.
+
+    Menus are rebuilt freely while an app is in use, so an app's entries are dropped
+    whenever it is activated or quits; a failed press drops them as well.
+    """
+
+    __slots__ = ("apps", "prefetched", "hits", "prefetch_hits", "misses")
+
+    def __init__(self):
+        self.apps = {}  # (pid, bundle) -> {escaped menu path: ui.Element}
+        self.prefetched = set()  # keys of apps whose entries were crawled ahead of time
+        self.hits = 0
+        self.prefetch_hits = 0  # subset of hits served from prefetched entries
+        self.misses = 0
+
+    def get(self, app: ui.App, menu_path: str, count=True):  # -> Optional[ui.Element]
+        """Returns the cached item at the escaped menu path, if it's still there
+
+        `count`: add to the hit and miss counters, which are meant to measure
+        `menu_select`
+        """
+        key = (app.pid, app.bundle)
+        if (menu_item := self.apps.get(key, {}).get(menu_path)) is not None:
+            try:
+                # Items can be retitled in place (e.g. "Show Sidebar" ▸ "Hide Sidebar")
+                if menu_item.AXTitle == menu_path_titles(menu_path)[-1]:
+                    if count:
+                        self.hits += 1
+                        if key in self.prefetched:
+                            self.prefetch_hits += 1
+                    return menu_item
+            except ui.UIErr:
+                pass
+            # Menu was rebuilt since we cached it
+            self.invalidate(app)
+
+        if count:
+            self.misses += 1
+        return None
+
+    def put(self, app: ui.App, menu_path: str, menu_item):
+        self.apps.setdefault((app.pid, app.bundle), {})[menu_path] = menu_item
+
+    def prefetch(self, app: ui.App, menu_items: dict):
+        key = (app.pid, app.bundle)
+        self.apps[key] = menu_items
+        self.prefetched.add(key)
+
+    def invalidate(self, app: ui.App):
+        key = (app.pid, app.bundle)
+        self.apps.pop(key, None)
+        self.prefetched.discard(key)
+
+
+MENU_ITEM_CACHE = MenuItemCache()
+
+ui.register("app_activate", MENU_ITEM_CACHE.invalidate)
+ui.register("app_close", MENU_ITEM_CACHE.invalidate)
+
+
+@dataclass(frozen=True)
+class MenuItemState:
+    exists: bool
+    enabled: bool = False
+    # has a mark (usually a checkmark; sometimes a dash for mixed state)
+    checked: bool = False
+
+
 @mod.action_class
 class Actions:
     def copy_menu_select():
@@ -422,11 +749,7 @@ class Actions:
             app.notify("No menu bar item selected or under the mouse pointer")
             return
 
-        escaped_menu_path = [
-            title.replace("\\", r"\\").replace("|", r"\|") for title in menu_path
-        ]
-
-        clip.set_text(f'user.menu_select({"|".join(escaped_menu_path)!r})')
+        clip.set_text(f"user.menu_select({menu_path_string(menu_path)!r})")
         app.notify(
             "Copied TalonScript to select menu item",
             body=f'{" ▸ ".join(menu_path)}\n{strategy}',
@@ -462,35 +785,48 @@ class Actions:
 
     def menu_select(menu_path: str) -> bool:
         """Selects the menu item at the specified |-delimited path, or returns False if it does not exist"""
-        menu_path = [
-            item_title.replace(r"\\", "\\").replace(r"\|", "|")
-            for item_title in re.split(r"(?<=[^\\])\|", menu_path)
-        ]
-        menu_title = menu_path[0]
-        try:
-            menu_item = active_menu_bar().children.find_one(
-                AXRole="AXMenuBarItem", AXTitle=menu_title
-            )
-        except ui.UIErr:
-            app.notify("Unable to locate menu to select", menu_title)
-            return False
-
-        for item_title in menu_path[1:]:
-            if len(menu_item.AXChildren) == 0:
-                break
-
-            menu = menu_item.children[0]
+        active_app = ui.active_app()
+        if (menu_item := MENU_ITEM_CACHE.get(active_app, menu_path)) is not None:
             try:
-                menu_item = menu.children.find_one(
-                    AXRole="AXMenuItem", AXTitle=item_title, max_depth=0
-                )
+                menu_item.perform("AXPress")
+                return True
             except ui.UIErr:
-                app.notify("Unable to locate menu item to select", item_title)
-                return False
+                # Menu was rebuilt since we cached it; look it up again.
+                MENU_ITEM_CACHE.invalidate(active_app)
 
-        if menu_item.AXTitle != menu_path[-1]:
-            app.notify("Expected a submenu", menu_item.AXTitle)
+        menu_item = MENU_PATH_RESOLVER.resolve(menu_path_titles(menu_path))
+        if menu_item is None:
             return False
 
         menu_item.perform("AXPress")
+        MENU_ITEM_CACHE.put(active_app, menu_path, menu_item)
         return True
+
+    def menu_select_many(menu_paths: list[str]) -> bool:
+        """Selects the menu items at each of the specified |-delimited paths in turn, or returns False at the first that does not exist"""
+        # consecutive paths in the same menu share its lookup; see MenuPathResolver
+        return all(actions.user.menu_select(menu_path) for menu_path in menu_paths)
+
+    def menu_item_state(menu_path: str) -> MenuItemState:
+        """Returns whether the menu item at the specified |-delimited path exists, is enabled and is checked, without selecting it"""
+        active_app = ui.active_app()
+        menu_item = MENU_ITEM_CACHE.get(active_app, menu_path, count=False)
+        if menu_item is None:
+            menu_item = MENU_PATH_RESOLVER.resolve(
+                menu_path_titles(menu_path), quiet=True
+            )
+            if menu_item is None:
+                return MenuItemState(exists=False)
+            MENU_ITEM_CACHE.put(active_app, menu_path, menu_item)
+
+        try:
+            enabled, mark_char = get_attributes(
+                menu_item, ("AXEnabled", "AXMenuItemMarkChar")
+            )
+        except ui.UIErr:
+            MENU_ITEM_CACHE.invalidate(active_app)
+            return MenuItemState(exists=False)
+
+        return MenuItemState(
+            exists=True, enabled=bool(enabled), checked=bool(mark_char)
+        )
@@ -0,0 +1,128 @@
+import os
+import re
+
+from talon import Module, app, settings, ui
+
+from .menu import menu_item_talon_key, menu_path_string
+from .menu_snapshot import WORD_RE, walk_menu_items
+
+mod = Module()
+
+mod.setting(
+    "menu_export_directory",
+    type=str,
+    default="~/Desktop",
+    desc="The directory to write exported menu key equivalents to",
+)
+
+
+def menu_item_keys(app: ui.App):
+    """Yields (path, Talon key) for every menu item in the app with a key equivalent"""
+    for menu_item, path, submenu in walk_menu_items(app):
+        if submenu:
+            continue
+        if (key := menu_item_talon_key(menu_item, quiet=True)) is not None:
+            yield path, key
+
+
+NUMBER_WORDS = (
+    "zero one two three four five six seven eight nine ten eleven twelve thirteen "
+    "fourteen fifteen sixteen seventeen eighteen nineteen"
+).split()
+TENS_WORDS = "_ _ twenty thirty forty fifty sixty seventy eighty ninety".split()
+
+
+def number_words(number: str) -> list[str]:
+    """Spells out a number as it would be spoken, e.g. "125" as "one hundred twenty
+    five"; digit by digit past 999, or with leading zeros"""
+    n = int(number)
+    if n > 999 or (number.startswith("0") and len(number) > 1):
+        return [NUMBER_WORDS[int(digit)] for digit in number]
+
+    words = []
+    if n >= 100:
+        words += [NUMBER_WORDS[n // 100], "hundred"]
+        n %= 100
+        if n == 0:
+            return words
+    if n >= 20:
+        words.append(TENS_WORDS[n // 10])
+        if n % 10:
+            words.append(NUMBER_WORDS[n % 10])
+    else:
+        words.append(NUMBER_WORDS[n])
+    return words
+
+
+def rule_words(path: list[str]) -> list[str]:
+    """Returns the words to say for a menu path in a TalonScript rule, which can't
+    contain digits"""
+    words = []
+    for word in WORD_RE.findall(" ".join(path).lower()):
+        # e.g. "zoom 200" and "h264"
+        for part in re.findall(r"\d+|\D+", word):
+            words += number_words(part) if part.isdecimal() else [part]
+    return words
+
+
+def export_talonscript(app: ui.App, file) -> int:
+    file.write(
+        f"""# Menu key equivalents for {app.name}
+os: mac
+app.bundle: {app.bundle}
+-
+"""
+    )
+
+    count = 0
+    rules = {}  # rule -> key
+    for path, key in menu_item_keys(app):
+        rule = " ".join(rule_words(path))
+        # e.g. titled only with symbols, which would leave just the menu's name
+        if not rule_words(path[-1:]):
+            file.write(f"# {menu_path_string(path)}: key({key}) has no words to say\n")
+        elif rule not in rules:
+            rules[rule] = key
+            file.write(f"{rule}: key({key})\n")
+            count += 1
+        elif rules[rule] != key:
+            # the first (leftmost/topmost) item wins, as for "menu <item>"
+            file.write(
+                f"# {menu_path_string(path)}: key({key}) would be said as {rule!r},"
+                f" like key({rules[rule]})\n"
+            )
+    return count
+
+
+def export_python(app: ui.App, file) -> int:
+    file.write(
+        f"# Menu key equivalents for {app.name} ({app.bundle})\nMENU_KEYS = {{\n"
+    )
+
+    count = 0
+    for path, key in menu_item_keys(app):
+        file.write(f"    {menu_path_string(path)!r}: {key!r},\n")
+        count += 1
+
+    file.write("}\n")
+    return count
+
+
+@mod.action_class
+class Actions:
+    def menu_export_keys(python: bool = False):
+        """Writes the key equivalents of every item in the active app's menus to a TalonScript (or Python) file"""
+        active_app = ui.active_app()
+        directory = os.path.expanduser(settings.get("user.menu_export_directory"))
+        path = os.path.join(
+            directory, f"{active_app.bundle}.{'py' if python else 'talon'}"
+        )
+
+        # written as we crawl, so very large menus needn't be held in memory
+        with open(path, "w", encoding="utf-8") as file:
+            if python:
+                count = export_python(active_app, file)
+            else:
+                count = export_talonscript(active_app, file)
+
+        app.notify(f"Exported {count} menu key equivalents", body=path)
@@ -0,0 +1,95 @@
+from typing import Optional
+
+from talon import Context, Module, actions, settings, ui
+
+from .menu_snapshot import MenuSnapshot
+
+mod = Module()
+
+mod.list("menu_items", desc="Menu items of the active application")
+
+mod.setting(
+    "menu_item_list",
+    type=bool,
+    default=False,
+    desc="Populate the menu items list from the active application's menu bar when it is activated. Menus are read in the background, as with user.menu_prefetch.",
+)
+
+ctx = Context()
+ctx.matches = r"""
+os: mac
+"""
+
+ctx.lists["user.menu_items"] = {}
+
+# menu item title -> spoken forms; titles recur across apps, so shared by all of them
+SPOKEN_FORMS = {}
+
+
+def generate_spoken_forms(titles):
+    """Generates spoken forms for titles not seen before, in a single batch"""
+    new_titles = [title for title in dict.fromkeys(titles) if title not in SPOKEN_FORMS]
+    if not new_titles:
+        return
+
+    for title in new_titles:
+        SPOKEN_FORMS[title] = []
+    spoken_forms = actions.user.create_spoken_forms_from_list(new_titles)
+    for spoken_form, title in spoken_forms.items():
+        SPOKEN_FORMS[title].append(spoken_form)
+
+
+class MenuItemList:
+    """Spoken forms of one app's actionable menu items, mapped to their menu paths"""
+
+    __slots__ = ("paths", "items")
+
+    def __init__(self):
+        self.paths = {}  # title -> path
+        self.items = {}  # spoken form -> path
+
+    def update(self, snapshot: MenuSnapshot) -> bool:
+        """Updates the list from a snapshot, returning whether it changed"""
+        paths = {}
+        for row, title in enumerate(snapshot.titles):
+            # the first (leftmost/topmost) item wins when titles repeat
+            if not snapshot.submenu[row] and title not in paths:
+                paths[title] = snapshot.paths[row]
+
+        if paths == self.paths:
+            return False
+
+        generate_spoken_forms(title for title in paths if title not in self.paths)
+
+        items = {}
+        for title, path in paths.items():
+            for spoken_form in SPOKEN_FORMS[title]:
+                items.setdefault(spoken_form, path)
+
+        self.paths = paths
+        self.items = items
+        return True
+
+
+MENU_ITEM_LISTS = {}  # bundle -> MenuItemList
+published_items = None
+
+
+def update_menu_item_list(app: ui.App, snapshot: Optional[MenuSnapshot]):
+    """Publishes the app's menu items from a snapshot of its menus, or none if it
+    has no menu bar"""
+    global published_items
+
+    if not settings.get("user.menu_item_list"):
+        return
+
+    if snapshot is None:
+        items = {}
+    else:
+        item_list = MENU_ITEM_LISTS.setdefault(app.bundle, MenuItemList())
+        item_list.update(snapshot)
+        items = item_list.items
+
+    if items is not published_items:
+        ctx.lists["user.menu_items"] = items
+        published_items = items
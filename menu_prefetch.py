@@ -0,0 +1,123 @@
+import queue
+import threading
+from functools import partial
+
+from talon import Module, app, cron, settings, ui
+
+from .menu import MENU_ITEM_CACHE
+from .menu_items import update_menu_item_list
+from .menu_snapshot import SNAPSHOTS, CrawlCancelled, MenuSearchIndex, MenuSnapshot
+
+mod = Module()
+
+mod.setting(
+    "menu_prefetch",
+    type=bool,
+    default=False,
+    desc="Crawl an application's menu bar in the background when it is activated, so menu commands don't have to.",
+)
+
+
+class MenuPrefetcher:
+    """Crawls the menus of activated apps on a worker thread.
+
+    Only the most recently activated app is ever waiting to be crawled, and a crawl
+    in progress is abandoned as soon as another app is activated.
+    """
+
+    __slots__ = (
+        "queue",
+        "thread",
+        "generation",
+        "completed",
+        "cancelled",
+        "failed",
+    )
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=1)  # (generation, app)
+        self.thread = None
+        self.generation = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.failed = 0
+
+    def schedule(self, app: ui.App):
+        self.generation += 1
+
+        # replace whatever was waiting, if the worker hasn't picked it up yet
+        try:
+            self.queue.get_nowait()
+            self.cancelled += 1
+        except queue.Empty:
+            pass
+        self.queue.put_nowait((self.generation, app))
+
+        if self.thread is None:
+            self.thread = threading.Thread(
+                target=self.run, name="menu prefetch", daemon=True
+            )
+            self.thread.start()
+
+    def run(self):
+        while True:
+            generation, app = self.queue.get()
+
+            def superseded():
+                return generation != self.generation
+
+            try:
+                snapshot = MenuSnapshot.crawl(app, cancelled=superseded)
+            except CrawlCancelled:
+                self.cancelled += 1
+                continue
+            except ui.UIErr:
+                # app has no menu bar, or went away while we were crawling it
+                self.failed += 1
+                snapshot = None
+            else:
+                # so the first menu search after switching apps needn't build it
+                snapshot.search_index = MenuSearchIndex(snapshot)
+                if superseded():
+                    self.cancelled += 1
+                    continue
+
+                SNAPSHOTS[(app.pid, app.bundle)] = snapshot
+                MENU_ITEM_CACHE.prefetch(app, snapshot.menu_items())
+                self.completed += 1
+
+            # Talon lists should be updated from the main thread
+            cron.after("0ms", partial(self.publish, generation, app, snapshot))
+
+    def publish(self, generation: int, app: ui.App, snapshot):
+        """Updates the menu item list from the app's snapshot (None if it has no menu
+        bar), unless another app has been activated since"""
+        if generation == self.generation:
+            update_menu_item_list(app, snapshot)
+
+
+PREFETCHER = MenuPrefetcher()
+
+
+def app_activated(app):
+    # the menu item list is built from the same crawl, so as not to crawl on the
+    # main thread
+    if settings.get("user.menu_prefetch") or settings.get("user.menu_item_list"):
+        PREFETCHER.schedule(app)
+
+
+ui.register("app_activate", app_activated)
+app.register("ready", lambda: app_activated(ui.active_app()))
+
+
+@mod.action_class
+class Actions:
+    def menu_prefetch_show():
+        """Prints how often menu commands were served from prefetched menus, and how menu prefetching has fared, to the Talon log"""
+        cache = MENU_ITEM_CACHE
+        print(
+            f"menu item cache: {cache.hits} hits ({cache.prefetch_hits} from prefetched menus), {cache.misses} misses"
+        )
+        print(
+            f"menu prefetch: {PREFETCHER.completed} completed, {PREFETCHER.cancelled} cancelled, {PREFETCHER.failed} failed"
+        )
@@ -0,0 +1,292 @@
+import heapq
+import re
+
+from talon import Module, actions, app, ui
+
+from .ax import get_attributes
+from .menu import menu_bar, menu_item_talon_key, menu_path_string
+
+mod = Module()
+
+
+class CrawlCancelled(Exception):
+    """Raised when a menu crawl is abandoned partway through"""
+
+
+class MenuSnapshot:
+    """Every item in an app's menu bar, flattened into parallel lists indexed by row"""
+
+    __slots__ = (
+        "pid",
+        "bundle",
+        "titles",
+        "paths",
+        "submenu",
+        "keys",
+        "elements",
+        "title_rows",
+        "search_index",
+    )
+
+    def __init__(self, pid: int, bundle: str):
+        self.pid = pid
+        self.bundle = bundle
+        self.titles = []
+        self.paths = []  # escaped, |-delimited, as accepted by menu_select
+        self.submenu = []  # whether the item opens a submenu rather than acting
+        self.keys = {}  # row -> Talon key string or None, read on first use
+        self.elements = []
+        self.title_rows = {}  # lowercase title -> rows
+        self.search_index = None  # built on first search
+
+    def __len__(self):
+        return len(self.titles)
+
+    def add(self, element, path, submenu):
+        title = path[-1]
+        self.title_rows.setdefault(title.lower(), []).append(len(self.titles))
+        self.titles.append(title)
+        self.paths.append(menu_path_string(path))
+        self.submenu.append(submenu)
+        self.elements.append(element)
+
+    def key(self, row: int):  # -> Optional[str]
+        """Returns the Talon key string of the item's key equivalent, or None if it has
+        none; only read from the app when first asked for, since few callers need it"""
+        if row not in self.keys:
+            self.keys[row] = (
+                None
+                if self.submenu[row]
+                else menu_item_talon_key(self.elements[row], quiet=True)
+            )
+        return self.keys[row]
+
+    def enabled(self, row: int) -> bool:
+        """Returns whether the item is enabled, read from the app each time since it
+        changes with the app's state"""
+        return bool(self.elements[row].get("AXEnabled"))
+
+    def rows_titled(self, title: str) -> list[int]:
+        """Returns the rows of items with the given title, ignoring case"""
+        return self.title_rows.get(title.lower(), [])
+
+    def rows_matching(self, partial_title: str) -> list[int]:
+        """Returns the rows of items whose titles contain `partial_title`, ignoring case"""
+        partial_title = partial_title.lower()
+        return sorted(
+            row
+            for title, rows in self.title_rows.items()
+            if partial_title in title
+            for row in rows
+        )
+
+    def menu_items(self) -> dict:
+        """Returns the elements of actionable items, keyed by escaped menu path"""
+        return {
+            path: element
+            for path, element, submenu in zip(self.paths, self.elements, self.submenu)
+            if not submenu
+        }
+
+    def search(self, query: str, limit: int = 5) -> list[tuple[float, int]]:
+        """Returns up to `limit` (score, row) pairs of actionable items, best match first"""
+        if self.search_index is None:
+            self.search_index = MenuSearchIndex(self)
+        return self.search_index.search(query, limit)
+
+    @staticmethod
+    def crawl(app: ui.App, cancelled=None) -> "MenuSnapshot":
+        """Walks the app's entire menu bar, recording each menu item once
+
+        `cancelled`: checked before each menu; if it returns True, raises `CrawlCancelled`
+        """
+        snapshot = MenuSnapshot(app.pid, app.bundle)
+        for menu_item, path, submenu in walk_menu_items(app, cancelled):
+            snapshot.add(menu_item, path, submenu)
+
+        return snapshot
+
+
+MENU_ITEM_ATTRIBUTES = ("AXRole", "AXTitle", "AXChildren")
+
+
+def walk_menu_items(app: ui.App, cancelled=None):
+    """Yields (menu item, path, whether it opens a submenu) for every titled item in
+    the app's menu bar, parents before their submenus' items"""
+    for menu_bar_item in menu_bar(app).children:
+        if not (title := menu_bar_item.get("AXTitle")):
+            continue
+        yield from walk_menu(menu_bar_item.children, [title], cancelled)
+
+
+def walk_menu(menus, path, cancelled):
+    """`menus`: the children of the menu bar item or menu item at `path`"""
+    for menu in menus:
+        if menu.AXRole != "AXMenu":
+            continue
+        if cancelled is not None and cancelled():
+            raise CrawlCancelled()
+
+        for menu_item in menu.children:
+            role, title, children = get_attributes(menu_item, MENU_ITEM_ATTRIBUTES)
+            # separators have no title
+            if role != "AXMenuItem" or not title:
+                continue
+
+            item_path = path + [title]
+            submenu = bool(children)
+            yield menu_item, item_path, submenu
+            if submenu:
+                # reuse the AXChildren we already have rather than fetching them again
+                yield from walk_menu(children, item_path, cancelled)
+
+
+# Below this similarity, the best match is usually not what was meant
+MIN_SEARCH_SCORE = 0.3
+
+
+WORD_RE = re.compile(r"[^\W_]+")
+
+
+def trigrams(text: str) -> set[str]:
+    """Returns the trigrams of the normalized words in `text`"""
+    text = " ".join(WORD_RE.findall(text.lower()))
+    text = f" {text} "
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def bitset(rows: list[int]) -> int:
+    """Returns an int with the bits of the (ascending) rows set"""
+    bits = bytearray(rows[-1] // 8 + 1)
+    for row in rows:
+        bits[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(bits, "little")
+
+
+class MenuSearchIndex:
+    """Trigram index over the paths of a snapshot's actionable menu items
+
+    Sets of rows are bitsets, so a query counts the trigrams it shares with every
+    row at once, with a few operations on ints per trigram.
+    """
+
+    __slots__ = ("postings", "size_rows")
+
+    def __init__(self, snapshot: MenuSnapshot):
+        postings = {}  # trigram -> rows
+        size_rows = {}  # number of trigrams -> rows
+        for row, path in enumerate(snapshot.paths):
+            if snapshot.submenu[row]:
+                continue
+            grams = trigrams(path)
+            size_rows.setdefault(len(grams), []).append(row)
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+
+        self.postings = {gram: bitset(rows) for gram, rows in postings.items()}
+        self.size_rows = {size: bitset(rows) for size, rows in size_rows.items()}
+
+    def search(self, query: str, limit: int) -> list[tuple[float, int]]:
+        query_grams = trigrams(query)
+
+        # Counts of shared trigrams, in binary: bit n of digits[place] is bit
+        # `place` of row n's count
+        digits = []
+        matched = 0
+        for gram in query_grams:
+            carry = self.postings.get(gram, 0)
+            matched |= carry
+            place = 0
+            while carry:
+                if place == len(digits):
+                    digits.append(carry)
+                    break
+                digit = digits[place]
+                digits[place], carry = digit ^ carry, digit & carry
+                place += 1
+        places = range(len(digits) - 1, -1, -1)
+
+        # Dice coefficient, which favors the shortest path containing the query.
+        # Rows with as many trigrams as each other rank by their counts alone, so
+        # take the best of each size in turn, starting with the sizes that could
+        # score highest.
+        query_size = len(query_grams)
+
+        def best_score(size):
+            return 2 * min(size, query_size) / (query_size + size)
+
+        best = []  # heap of (score, -row); ties go to the earlier row
+        for size in sorted(self.size_rows, key=best_score, reverse=True):
+            if len(best) == limit and best_score(size) < best[0][0]:
+                break
+
+            rows = self.size_rows[size] & matched
+            while rows:
+                # narrow to the rows with the highest count, one binary digit at a time
+                top, count = rows, 0
+                for place in places:
+                    if top & digits[place]:
+                        top &= digits[place]
+                        count |= 1 << place
+
+                score = 2 * count / (query_size + size)
+                if len(best) == limit and score < best[0][0]:
+                    break
+
+                rows &= ~top
+                while top:
+                    lowest = top & -top
+                    result = (score, 1 - lowest.bit_length())
+                    if len(best) < limit:
+                        heapq.heappush(best, result)
+                    elif result > best[0]:
+                        heapq.heapreplace(best, result)
+                    else:
+                        break
+                    top ^= lowest
+
+        return [(score, -row) for score, row in sorted(best, reverse=True)]
+
+
+SNAPSHOTS = {}  # (pid, bundle) -> MenuSnapshot
+
+
+def menu_snapshot(app: ui.App = None) -> MenuSnapshot:
+    """Returns a snapshot of the app's menu bar (by default, the active app's), crawling it if needed"""
+    if app is None:
+        app = ui.active_app()
+
+    key = (app.pid, app.bundle)
+    if (snapshot := SNAPSHOTS.get(key)) is None:
+        snapshot = SNAPSHOTS[key] = MenuSnapshot.crawl(app)
+    return snapshot
+
+
+def invalidate_snapshot(app: ui.App):
+    SNAPSHOTS.pop((app.pid, app.bundle), None)
+
+
+ui.register("app_activate", invalidate_snapshot)
+ui.register("app_close", invalidate_snapshot)
+
+
+@mod.action_class
+class Actions:
+    def menu_paths_matching(partial_title: str) -> list[str]:
+        """Returns the |-delimited paths of the active app's menu items whose titles contain `partial_title`"""
+        snapshot = menu_snapshot()
+        return [snapshot.paths[row] for row in snapshot.rows_matching(partial_title)]
+
+    def menu_search(query: str) -> bool:
+        """Selects the active app's menu item best matching `query`, or returns False if nothing is close"""
+        snapshot = menu_snapshot()
+        if not (results := snapshot.search(query, limit=1)):
+            app.notify("No menu item matching", query)
+            return False
+
+        score, row = results[0]
+        if score < MIN_SEARCH_SCORE:
+            app.notify("No menu item matching", query)
+            return False
+
+        return actions.user.menu_select(snapshot.paths[row])
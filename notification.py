@@ -1,17 +1,53 @@
+import json
+import os
+import platform
+import queue
+import sys
+import threading
+import time
+from bisect import bisect_right
+from collections import Counter, deque
 from dataclasses import dataclass, field
+from functools import lru_cache, partial
 from itertools import chain
 from typing import Optional
 from uuid import UUID
 
 from talon import Context, Module, actions, app, cron, imgui, settings, ui
 
+try:
+    from talon.ui import Element
+except ImportError:
+    Element = type(None)
+
+from .ax import get_attributes
+
 # XXX(nriley) actions are being returned out of order; that's a problem if we want to pop up a menu
 
 mod = Module()
 
 mod.list("notification_actions", desc="Notification actions")
 mod.list("notification_apps", desc="Notification apps")
+mod.list("notification_history_apps", desc="Apps in the notification history")
 
+mod.setting(
+    "notification_refresh_delay",
+    type=int,
+    default=50,
+    desc="Milliseconds to wait for further requests before rescanning notifications, so bursts are handled by a single scan.",
+)
+mod.setting(
+    "notification_history_size",
+    type=int,
+    default=500,
+    desc="Number of past notifications to remember; 0 turns notification history off.",
+)
+mod.setting(
+    "notification_history_log",
+    type=bool,
+    default=False,
+    desc="Also log notifications to notification_history.jsonl in the Talon user directory, so they are remembered across restarts.",
+)
 mod.setting(
     "notification_debug",
     type=bool,
@@ -61,6 +97,41 @@ class Actions:
     def notification_center():
         """Display or hide Notification Center"""
 
+    def notification_history_show(app_name: str = "", text: str = ""):
+        """Display the most recent notification seen, optionally only those from the specified app and/or containing the specified text"""
+
+
+MACOS_VERSION = tuple(int(part) for part in platform.mac_ver()[0].split(".") if part)
+
+# macOS Sequoia uses AXButton, previous versions use AXGroup; try the likelier one first.
+if MACOS_VERSION >= (15,):
+    NOTIFICATION_GROUP_ROLES = ("AXButton", "AXGroup")
+else:
+    NOTIFICATION_GROUP_ROLES = ("AXGroup", "AXButton")
+
+# role of notification groups, once we've seen some
+notification_group_role = None
+
+
+# allow closing a notification stack like an individual notification
+ACTION_ALIASES = {"close": "clear all"}
+
+
+@lru_cache(maxsize=256)
+def normalized_actions(group_actions: tuple[tuple[str, str]]) -> dict[str, str]:
+    """Returns {speakable name: action} for a group's (action, name) pairs.
+
+    Notifications from the same app usually offer the same actions, so they share
+    the result; callers must not modify it.
+    """
+    # XXX(nriley) create_spoken_forms_from_list doesn't handle apostrophes correctly
+    # https://github.com/knausj85/knausj_talon/issues/780
+    return {
+        sys.intern(name.lower().replace("’", "'")): action
+        for action, name in group_actions
+        if action != "AXScrollToVisible"  # not useful
+    }
+
 
 @dataclass(frozen=True)
 class Notification:
@@ -68,11 +139,42 @@ class Notification:
     subrole: str = field(default=None, compare=False)
     app_name: str = field(default=None, compare=False)
     stacking_identifier: str = field(default=None, compare=False)
-    title: str = field(default=None, compare=False)
-    subtitle: str = field(default=None, compare=False)
-    body: str = field(default=None, compare=False)
     # action values are named "Name:<name>\nTarget:0x0\nSelector:(null)"; keys are speakable
     actions: dict[str, str] = field(default=None, compare=False)
+    # title, subtitle and body are looked up in the group when first used
+    group: Element = field(default=None, compare=False, repr=False)
+    text: dict[str, Optional[str]] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+
+    def action(self, name: str) -> Optional[str]:
+        """Returns the action with the given speakable name (or alias), if offered"""
+        if (action := self.actions.get(name)) is None and name in ACTION_ALIASES:
+            action = self.actions.get(ACTION_ALIASES[name])
+        return action
+
+    @property
+    def title(self) -> Optional[str]:
+        return self.group_text("title")
+
+    @property
+    def subtitle(self) -> Optional[str]:
+        return self.group_text("subtitle")
+
+    @property
+    def body(self) -> Optional[str]:
+        return self.group_text("body")
+
+    def group_text(self, identifier: str) -> Optional[str]:
+        if identifier not in self.text:
+            try:
+                value = self.group.children.find_one(AXIdentifier=identifier).AXValue
+            except (AttributeError, ui.UIErr):
+                # no group, or it's gone from Notification Center since
+                value = None
+            self.text[identifier] = value
+
+        return self.text[identifier]
 
     @staticmethod
     def group_identifier(group):
@@ -92,59 +194,90 @@ class Notification:
     @staticmethod
     def from_group(group, identifier):
         # XXX(nriley) better handle AXNotificationCenterBannerStack
-        group_actions = group.actions
-        if "AXScrollToVisible" in group_actions:
-            del group_actions["AXScrollToVisible"]  # not useful
-        # XXX(nriley) create_spoken_forms_from_list doesn't handle apostrophes correctly
-        # https://github.com/knausj85/knausj_talon/issues/780
-        group_actions = {
-            name.lower().replace("’", "'"): action
-            for action, name in group_actions.items()
-        }
-
-        title = body = subtitle = None
+        group_actions = normalized_actions(tuple(group.actions.items()))
 
-        try:
-            title = group.children.find_one(AXIdentifier="title").AXValue
-        except ui.UIErr:
-            pass
-
-        try:
-            body = group.children.find_one(AXIdentifier="body").AXValue
-        except ui.UIErr:
-            pass
-
-        try:
-            subtitle = group.children.find_one(AXIdentifier="subtitle").AXValue
-        except ui.UIErr:
-            pass
+        subrole, app_name, stacking_identifier = get_attributes(
+            group, ("AXSubrole", "AXDescription", "AXStackingIdentifier")
+        )
 
         return Notification(
             identifier=identifier,
-            subrole=group.AXSubrole,
-            app_name=group.AXDescription,
-            stacking_identifier=group.AXStackingIdentifier,
-            title=title,
-            subtitle=subtitle,
-            body=body,
+            subrole=subrole,
+            app_name=app_name,
+            stacking_identifier=stacking_identifier,
             actions=group_actions,
+            group=group,
         )
 
+    @staticmethod
+    def groups_in_window(window):
+        """Returns {identifier: group} for the notifications in the window"""
+        global notification_group_role
+
+        if notification_group_role is not None:
+            roles = (notification_group_role,)
+        else:
+            roles = NOTIFICATION_GROUP_ROLES
+
+        for role in roles:
+            groups = {}
+            for group in window.children.find(AXRole=role):
+                if identifier := Notification.group_identifier(group):
+                    groups[identifier] = group
+
+            if groups:
+                # only one layout is ever in use, so stop looking for the other
+                notification_group_role = role
+                return groups
+
+        return {}
+
     @staticmethod
     def notifications_in_window(window):
-        notifications = []
+        return [
+            Notification.from_group(group, identifier)
+            for identifier, group in Notification.groups_in_window(window).items()
+        ]
+
+
+# Enough for the action and app name combinations seen over a typical session
+SPOKEN_FORM_CACHE_SIZE = 64
 
-        # macOS Sequoia uses AXButton, previous versions use AXGroup.
-        for group in list(window.children.find(AXRole="AXGroup")) + list(
-            window.children.find(AXRole="AXButton")
-        ):
-            if not (identifier := Notification.group_identifier(group)):
-                continue
 
-            notification = Notification.from_group(group, identifier)
-            notifications.append(notification)
+@lru_cache(maxsize=SPOKEN_FORM_CACHE_SIZE)
+def spoken_forms(names: tuple[str], words_to_exclude: tuple[str] = ()) -> dict:
+    """Memoized create_spoken_forms_from_list; callers must not modify the result"""
+    return actions.user.create_spoken_forms_from_list(
+        list(names), words_to_exclude=list(words_to_exclude)
+    )
 
-        return notifications
+
+@lru_cache(maxsize=SPOKEN_FORM_CACHE_SIZE)
+def action_spoken_forms(notification_actions: tuple[str]) -> dict:
+    """Returns the notification actions list for the given (sorted) action names"""
+    # XXX(nriley) create_spoken_forms_from_list doesn't handle apostrophes correctly
+    # https://github.com/knausj85/knausj_talon/issues/780
+    apostrophe_words = {
+        word.replace("'", " "): word
+        for word in chain.from_iterable(
+            action.split() for action in notification_actions
+        )
+        if "'" in word
+    }
+    words_to_exclude = tuple(word.split(" ")[0] for word in apostrophe_words)
+    action_list = dict(spoken_forms(notification_actions, words_to_exclude))
+    if apostrophe_words:
+        action_list = {
+            spoken_form.replace(mangled_word, word): action
+            for mangled_word, word in apostrophe_words.items()
+            for spoken_form, action in action_list.items()
+            if "apostrophe" not in spoken_form
+        }
+
+    for alias, action in ACTION_ALIASES.items():
+        if alias not in action_list and action in action_list:
+            action_list[alias] = action
+    return action_list
 
 
 MONITOR = None
@@ -156,6 +289,7 @@ os: mac
 
 ctx.lists["user.notification_actions"] = {}
 ctx.lists["user.notification_apps"] = {}
+ctx.lists["user.notification_history_apps"] = {}
 
 
 @ctx.action_class("user")
@@ -170,7 +304,7 @@ class UserActions:
         MONITOR.show_actions(index)
 
     def notifications_update():
-        MONITOR.update_notifications()
+        MONITOR.refresher.request()
 
     def notification_center():
         cc = ui.apps(bundle="com.apple.controlcenter")[0]
@@ -181,6 +315,18 @@ class UserActions:
             max_depth=0,
         ).perform("AXPress")
 
+    def notification_history_show(app_name: str = "", text: str = ""):
+        entry = next(HISTORY.find(app_name=app_name or None, text=text or None), None)
+        if entry is None:
+            app.notify("No such notification in history")
+            return
+
+        received = time.strftime("%c", time.localtime(entry.time))
+        app.notify(
+            f"{entry.app_name}: {entry.title or ''}",
+            body=f"{entry.body or ''}\n{received}",
+        )
+
 
 @imgui.open()
 def gui_actions(gui: imgui.GUI):
@@ -196,54 +342,423 @@ def gui_actions(gui: imgui.GUI):
         actions.user.notification_show_actions(-1)
 
 
+class RefreshScheduler:
+    """Coalesces requests to rescan notifications.
+
+    Requests within `user.notification_refresh_delay` of each other share one scan,
+    and only one scan runs at a time; requests made while it runs get another.
+    """
+
+    __slots__ = (
+        "scan",
+        "job",
+        "due",
+        "scanning",
+        "pending",
+        "last_scan",
+        "callbacks",
+        "requests",
+        "scans",
+        "scan_time",
+        "max_scan_time",
+    )
+
+    def __init__(self, scan):
+        self.scan = scan
+        self.job = None
+        self.due = 0  # time.monotonic() at which the scheduled job runs
+        self.scanning = False
+        self.pending = False  # requested since the last scan started
+        self.last_scan = None  # time.monotonic() at which the last scan finished
+        self.callbacks = []
+        # for debugging: how well requests are coalesced, and how long scans take
+        self.requests = 0
+        self.scans = 0
+        self.scan_time = 0.0
+        self.max_scan_time = 0.0
+
+    @staticmethod
+    def delay() -> float:
+        return settings.get("user.notification_refresh_delay") / 1000
+
+    def request(self, delay: Optional[float] = None, callback=None):
+        """Scans once no further requests have arrived for `delay` seconds (by default,
+        the refresh delay), then calls `callback`"""
+        if delay is None:
+            delay = self.delay()
+        if callback is not None:
+            self.callbacks.append(callback)
+        self.requests += 1
+        self.pending = True
+        if not self.scanning:
+            self.schedule(delay)
+
+    def schedule(self, delay: float):
+        due = time.monotonic() + delay
+        if self.job is not None:
+            if due <= self.due:
+                return
+            cron.cancel(self.job)
+        self.due = due
+        self.job = cron.after(f"{round(delay * 1000)}ms", self.run)
+
+    def ensure_fresh(self):
+        """Scans now, unless the last scan is recent and nothing has requested one since"""
+        if (
+            not self.pending
+            and self.last_scan is not None
+            and time.monotonic() - self.last_scan < self.delay()
+        ):
+            return
+
+        if self.job is not None:
+            cron.cancel(self.job)
+        self.run()
+
+    def run(self):
+        self.job = None
+        if self.scanning:
+            return
+
+        self.scanning = True
+        self.pending = False
+        callbacks, self.callbacks = self.callbacks, []
+        start = time.perf_counter()
+        try:
+            self.scan()
+        finally:
+            self.scanning = False
+            self.last_scan = time.monotonic()
+
+        elapsed = time.perf_counter() - start
+        self.scans += 1
+        self.scan_time += elapsed
+        self.max_scan_time = max(self.max_scan_time, elapsed)
+        debug_print(
+            "scan",
+            f"{elapsed * 1000:.1f} ms (mean {self.scan_time / self.scans * 1000:.1f} ms,"
+            f" max {self.max_scan_time * 1000:.1f} ms;"
+            f" {self.scans} scans for {self.requests} requests)",
+        )
+
+        for callback in callbacks:
+            callback()
+
+        if self.pending:
+            self.schedule(self.delay())
+
+
+class HistoryEntry:
+    __slots__ = ("time", "identifier", "app_name", "title", "body")
+
+    def __init__(self, time, identifier, app_name, title, body):
+        self.time = time
+        self.identifier = identifier  # as a string, so it can be logged
+        self.app_name = app_name
+        self.title = title
+        self.body = body
+
+    @property
+    def key(self):
+        # integer identifiers are reused once Notification Center restarts
+        return self.identifier, self.title
+
+    def matches(self, app_name: Optional[str], text: Optional[str]) -> bool:
+        if app_name is not None and self.app_name != app_name:
+            return False
+        if text is not None:
+            text = text.lower()
+            return any(
+                field is not None and text in field.lower()
+                for field in (self.title, self.body)
+            )
+        return True
+
+    def log_line(self) -> str:
+        fields = [self.time, self.identifier, self.app_name, self.title, self.body]
+        return json.dumps(fields, ensure_ascii=False) + "\n"
+
+
+# Notifications posted by Talon itself, with `app.notify`, are from this app
+TALON_APP_NAME = "Talon"
+
+
+class NotificationHistory:
+    """Every notification seen, most recent last, up to `user.notification_history_size`.
+
+    A notification is only recorded once, however often its banner reappears in
+    Notification Center. Logging to disk happens in batches on a worker thread.
+    """
+
+    __slots__ = (
+        "entries",
+        "keys",
+        "app_names",
+        "queue",
+        "thread",
+        "log_path",
+        "log_lines",
+    )
+
+    def __init__(self):
+        # a size of 0 turns history off
+        self.entries = deque(
+            maxlen=max(0, settings.get("user.notification_history_size"))
+        )
+        self.keys = set()  # of the entries
+        self.app_names = set()
+        self.queue = queue.Queue()  # HistoryEntry to log
+        self.thread = None
+        self.log_path = None
+        self.log_lines = 0
+
+        if self.entries.maxlen and settings.get("user.notification_history_log"):
+            self.log_path = os.path.join(
+                actions.path.talon_user(), "notification_history.jsonl"
+            )
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.log_path, encoding="utf-8") as log:
+                for line in log:
+                    self.log_lines += 1
+                    try:
+                        self.add(HistoryEntry(*json.loads(line)))
+                    except (ValueError, TypeError):
+                        # probably cut short when Talon exited mid-write
+                        continue
+        except FileNotFoundError:
+            pass
+        self.update_app_list()
+
+    def add(self, entry: HistoryEntry) -> bool:
+        if not self.entries.maxlen or entry.key in self.keys:
+            return False
+
+        if len(self.entries) == self.entries.maxlen:
+            self.keys.discard(self.entries[0].key)
+        self.entries.append(entry)
+        self.keys.add(entry.key)
+        return True
+
+    def record(self, notification: Notification):
+        # e.g. notification_history_show's own answer, which would otherwise
+        # become the last notification
+        if notification.app_name == TALON_APP_NAME:
+            return
+
+        entry = HistoryEntry(
+            time.time(),
+            str(notification.identifier),
+            notification.app_name,
+            # read now, while the notification is certainly still there
+            notification.title,
+            notification.body,
+        )
+        if not self.add(entry):
+            return
+
+        if self.log_path is not None:
+            self.queue.put(entry)
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.run, name="notification history", daemon=True
+                )
+                self.thread.start()
+
+        if notification.app_name not in self.app_names:
+            self.update_app_list()
+
+    def update_app_list(self):
+        self.app_names = {entry.app_name for entry in self.entries}
+        ctx.lists["user.notification_history_apps"] = spoken_forms(
+            tuple(sorted(filter(None, self.app_names)))
+        )
+
+    def find(self, app_name: Optional[str] = None, text: Optional[str] = None):
+        """Yields entries from the given app and/or containing the given text, newest first"""
+        for entry in reversed(list(self.entries)):
+            if entry.matches(app_name, text):
+                yield entry
+
+    def run(self):
+        while True:
+            batch = [self.queue.get()]
+            while True:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            self.write([entry.log_line() for entry in batch])
+
+    def write(self, lines: list[str]):
+        if self.log_lines + len(lines) <= 2 * self.entries.maxlen:
+            with open(self.log_path, "a", encoding="utf-8") as log:
+                log.writelines(lines)
+            self.log_lines += len(lines)
+            return
+
+        # rewrite the log with only as much as we remember
+        try:
+            with open(self.log_path, encoding="utf-8") as log:
+                kept = log.readlines()
+        except FileNotFoundError:
+            kept = []
+        kept = kept[max(0, len(kept) + len(lines) - self.entries.maxlen) :]
+        # a line cut short by Talon exiting mid-write has no newline
+        lines = [line for line in kept if line.endswith("\n")] + lines
+
+        temporary_path = self.log_path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as log:
+            log.writelines(lines)
+        os.replace(temporary_path, self.log_path)
+        self.log_lines = len(lines)
+
+
+HISTORY = None
+
+
+class WindowEvents:
+    """Reports changes to Notification Center's windows as (kind, window), where kind
+    is "created", "changed" or "destroyed".
+
+    Talon doesn't deliver AX notifications for arbitrary elements, but a banner
+    window is resized or retitled when a notification is stacked onto or updated
+    in it, so those window events stand in for element-level changes.
+    """
+
+    EVENTS = {
+        "win_open": "created",
+        "win_resize": "changed",
+        "win_title": "changed",
+        "win_close": "destroyed",
+    }
+
+    __slots__ = ("pid", "callback", "handlers")
+
+    def __init__(self, pid: int):
+        self.pid = pid
+        self.callback = None
+        self.handlers = {}
+
+    def subscribe(self, callback):
+        self.callback = callback
+        for event, kind in self.EVENTS.items():
+            handler = self.handlers[event] = partial(self.dispatch, kind)
+            ui.register(event, handler)
+
+    def unsubscribe(self):
+        for event, handler in self.handlers.items():
+            ui.unregister(event, handler)
+        self.handlers = {}
+
+    def dispatch(self, kind: str, window: ui.Window):
+        if window.app.pid == self.pid:
+            self.callback(kind, window)
+
+
 class NotificationMonitor:
     __slots__ = (
         "pid",
+        "refresher",
+        "window_refresher",
+        "changed_windows",
         "notifications",
+        "groups",
+        "windows",
+        "owners",
+        "order",
+        "order_y",
+        "action_index",
+        "app_index",
+        "action_names",
+        "app_names",
+        "list_updates",
+        "events",
     )
 
-    def __init__(self, app: ui.App):
+    def __init__(self, app: ui.App, events=None):
+        """`events`: source of window changes to apply incrementally; see `WindowEvents`"""
         self.pid = app.pid
-        self.notifications = []
-
-        ui.register("win_open", self.win_open)
-        ui.register("win_close", self.win_close)
+        self.refresher = RefreshScheduler(self.update_notifications)
+        # banners resize and retitle repeatedly as they animate; coalesce those too
+        self.window_refresher = RefreshScheduler(self.update_changed_windows)
+        self.changed_windows = {}  # window id -> window
+        self.notifications = {}  # identifier -> Notification
+        self.groups = {}  # identifier -> (group, frame) as of the last scan
+        self.windows = {}  # window id -> {identifier: y} of its notifications
+        # identifier -> id of the window it was last seen in; a notification can move
+        # between windows, and only that window's changes should remove it
+        self.owners = {}
+        # identifiers top to bottom, and their y positions
+        self.order = []
+        self.order_y = []
+        # action name/app name -> identifiers of the notifications offering/from it
+        self.action_index = {}
+        self.app_index = {}
+        # what the Talon lists were last generated from
+        self.action_names = None
+        self.app_names = None
+        self.list_updates = Counter()  # list name -> times regenerated
+
+        self.events = events if events is not None else WindowEvents(self.pid)
+        self.events.subscribe(self.window_changed)
         ui.register("app_close", self.app_closed)
 
-        self.update_notifications()
+        self.refresher.run()
 
-    def win_open(self, window):
-        if not window.app.pid == self.pid:
+    def window_changed(self, kind: str, window: ui.Window):
+        if gui_actions.showing:
+            gui_actions.hide()
+
+        if kind == "changed":
+            self.changed_windows[window.id] = window
+            self.window_refresher.request()
             return
 
-        notifications = Notification.notifications_in_window(window)
-        self.update_notifications(adding=notifications)
+        self.changed_windows.pop(window.id, None)
+        if kind == "destroyed":
+            changed = self.remove_window(window.id)
+        else:
+            changed = self.rescan_window(window)
 
-    def notification_groups(self):
-        ncui = ui.apps(pid=self.pid)[0]
-        for window in ncui.windows():
-            # macOS Sequoia uses AXButton, previous versions use AXGroup.
-            for group in list(window.children.find(AXRole="AXGroup")) + list(
-                window.children.find(AXRole="AXButton")
-            ):
-                if not (identifier := Notification.group_identifier(group)):
-                    continue
+        if changed:
+            self.notifications_changed()
 
-                yield identifier, group
+    def rescan_window(self, window: ui.Window) -> bool:
+        try:
+            groups = Notification.groups_in_window(window)
+        except ui.UIErr:
+            # window went away or is mid-update; fall back to a full rescan
+            self.refresher.request()
+            return False
+        return self.update_window(window.id, groups)
+
+    def update_changed_windows(self):
+        windows, self.changed_windows = self.changed_windows, {}
+        changed = False
+        for window in windows.values():
+            changed |= self.rescan_window(window)
+
+        if changed:
+            self.notifications_changed()
 
     def __getitem__(self, index):
-        if index < 0 or index > len(self.notifications) - 1:
+        if index < 0 or index > len(self.order) - 1:
             app.notify(f"Unable to locate notification #{index + 1}", "Try again?")
             return None
 
-        return self.notifications[index]
+        return self.notifications[self.order[index]]
 
     def perform_action(
         self, action: str, index: Optional[int] = None, app_name: str = None
     ):
-        self.update_notifications()
+        self.refresher.ensure_fresh()
 
-        cron.after("500ms", self.update_notifications)
+        # pick up the results of the action once Notification Center has animated them
+        self.refresher.request(delay=0.5)
 
         notification = None
         if index is not None:
@@ -251,35 +766,37 @@ class NotificationMonitor:
                 return False
 
         elif app_name is not None:
-            try:
-                notification = next(
-                    notification
-                    for notification in self.notifications
-                    if notification.app_name == app_name
-                )
-            except StopIteration:
+            if not (identifiers := self.app_index.get(app_name)):
                 app.notify(
                     f"Unable to locate notification for {app_name}", "Try again?"
                 )
                 return False
 
-        for identifier, group in self.notification_groups():
-            if identifier != notification.identifier:
-                continue
+            # prefer the topmost of the app's notifications offering the action
+            app_notifications = [
+                self.notifications[identifier]
+                for identifier in self.order
+                if identifier in identifiers
+            ]
+            notification = next(
+                (
+                    notification
+                    for notification in app_notifications
+                    if notification.action(action) is not None
+                ),
+                app_notifications[0],
+            )
 
-            if action not in notification.actions:
-                # allow closing a notification stack like an individual notification
-                if action == "close" and "clear all" in notification.actions:
-                    action = "clear all"
-                else:
-                    app.notify(f"No such action “{action}”", "Try again?")
-                    return False
+        if (group := self.group(notification.identifier)) is None:
+            app.notify("Unable to locate notification", "Try again?")
+            return False
 
-            group.perform(notification.actions[action])
-            return True
+        if (ax_action := notification.action(action)) is None:
+            app.notify(f"No such action “{action}”", "Try again?")
+            return False
 
-        app.notify("Unable to locate notification", "Try again?")
-        return False
+        group.perform(ax_action)
+        return True
 
     def show_actions(self, index: int):
         global notification_actions
@@ -290,103 +807,188 @@ class NotificationMonitor:
         if index == -1:
             return
 
-        self.update_notifications()
+        self.refresher.ensure_fresh()
 
         if (notification := self[index]) is None:
             return
 
-        for identifier, group in self.notification_groups():
-            if identifier != notification.identifier:
-                continue
-
-            notification_actions = set(notification.actions.keys())
-
-            frame = group.AXFrame
-            break
-        else:
+        if self.group(notification.identifier) is None:
             return
 
+        notification_actions = set(notification.actions.keys())
+        _, frame = self.groups[notification.identifier]
+
         gui_actions.x = frame.left - 300
         gui_actions.y = frame.top
         gui_actions.show()
 
-    def update_notifications(self, adding=[]):
+    def group(self, identifier):  # -> Optional[ui.Element]
+        """Returns the notification's group element, rescanning if it has gone stale"""
+        if (group_frame := self.groups.get(identifier)) is not None:
+            group = group_frame[0]
+            try:
+                if Notification.group_identifier(group) == identifier:
+                    return group
+            except ui.UIErr:
+                pass
+
+        self.refresher.run()
+        if (group_frame := self.groups.get(identifier)) is not None:
+            return group_frame[0]
+        return None
+
+    def update_window(self, window_id, groups) -> bool:
+        """Brings the notifications recorded for a window in line with its current
+        groups, returning whether anything changed"""
+        old_positions = self.windows.get(window_id, {})
+        positions = {}
+        changed = False
+
+        for identifier in old_positions.keys() - groups.keys():
+            if self.owners.get(identifier) == window_id:
+                self.remove(identifier)
+                changed = True
+
+        for identifier, group in groups.items():
+            if (owner := self.owners.get(identifier)) != window_id:
+                if owner is not None:
+                    self.disown(owner, identifier)
+                self.owners[identifier] = window_id
+
+            frame = group.AXFrame
+            self.groups[identifier] = (group, frame)
+            y = positions[identifier] = frame.top
+            if identifier not in self.notifications:
+                notification = Notification.from_group(group, identifier)
+                self.notifications[identifier] = notification
+                self.index(notification)
+                HISTORY.record(notification)
+            elif old_positions.get(identifier) == y:
+                continue
+            else:
+                self.unorder(identifier)
+
+            # groups may be not be returned in order of increasing y
+            position = bisect_right(self.order_y, y)
+            self.order.insert(position, identifier)
+            self.order_y.insert(position, y)
+            changed = True
+
+        if positions:
+            self.windows[window_id] = positions
+        else:
+            self.windows.pop(window_id, None)
+
+        return changed
+
+    def disown(self, window_id, identifier):
+        """Forgets that the window shows the notification, which has moved elsewhere"""
+        positions = self.windows[window_id]
+        del positions[identifier]
+        if not positions:
+            del self.windows[window_id]
+
+    def unorder(self, identifier):
+        position = self.order.index(identifier)
+        del self.order[position], self.order_y[position]
+
+    def index(self, notification: Notification):
+        identifier = notification.identifier
+        for name in notification.actions:
+            self.action_index.setdefault(name, set()).add(identifier)
+        self.app_index.setdefault(notification.app_name, set()).add(identifier)
+
+    def unindex(self, notification: Notification):
+        identifier = notification.identifier
+        for index, keys in (
+            (self.action_index, notification.actions),
+            (self.app_index, (notification.app_name,)),
+        ):
+            for key in keys:
+                identifiers = index[key]
+                identifiers.discard(identifier)
+                if not identifiers:
+                    del index[key]
+
+    def remove(self, identifier):
+        self.unorder(identifier)
+        self.unindex(self.notifications.pop(identifier))
+        self.groups.pop(identifier, None)
+        del self.owners[identifier]
+
+    def remove_window(self, window_id) -> bool:
+        if (positions := self.windows.pop(window_id, None)) is None:
+            return False
+
+        for identifier in positions:
+            if self.owners.get(identifier) == window_id:
+                self.remove(identifier)
+        return True
+
+    def update_notifications(self):
         if gui_actions.showing:
             gui_actions.hide()
 
-        if adding:
-            self.notifications += adding
+        changed = False
+        window_ids = set()
+        ncui = ui.apps(pid=self.pid)[0]
+        for window in ncui.windows():
+            window_ids.add(window.id)
+            groups = Notification.groups_in_window(window)
+            changed |= self.update_window(window.id, groups)
 
-        notifications = {}
-        for identifier, group in self.notification_groups():
-            y = group.AXPosition.y
+        for window_id in self.windows.keys() - window_ids:
+            changed |= self.remove_window(window_id)
 
-            try:
-                notifications[y] = self.notifications[
-                    self.notifications.index(Notification(identifier=identifier))
-                ]
-            except ValueError:
-                notifications[y] = Notification.from_group(group, identifier)
-
-        # groups may be not be returned in order of increasing y
-        notifications = dict(sorted(notifications.items()))
-
-        self.notifications = list(notifications.values())
-        if notifications:
-            debug_print("notifications", notifications)
-
-        notification_actions = set()
-        notification_apps = set()
-
-        for notification in self.notifications:
-            notification_actions.update(notification.actions.keys())
-            notification_apps.add(notification.app_name)
-
-        notification_actions = list(notification_actions)
-        # XXX(nriley) create_spoken_forms_from_list doesn't handle apostrophes correctly
-        # https://github.com/knausj85/knausj_talon/issues/780
-        apostrophe_words = {
-            word.replace("'", " "): word
-            for word in chain.from_iterable(
-                action.split() for action in notification_actions
-            )
-            if "'" in word
-        }
-        words_to_exclude = [word.split(" ")[0] for word in apostrophe_words]
-        notification_actions = actions.user.create_spoken_forms_from_list(
-            notification_actions, words_to_exclude=words_to_exclude
+        if changed:
+            self.notifications_changed()
+
+    def notifications_changed(self):
+        if self.order:
+            debug_print("notifications", [self.notifications[i] for i in self.order])
+
+        notification_actions = set(self.action_index)
+        notification_apps = set(self.app_index)
+
+        if notification_actions != self.action_names:
+            self.action_names = notification_actions
+            self.update_action_list(notification_actions)
+            self.list_updates["actions"] += 1
+
+        if notification_apps != self.app_names:
+            self.app_names = notification_apps
+            self.update_app_list(notification_apps)
+            self.list_updates["apps"] += 1
+
+        debug_print(
+            "list updates",
+            f"{len(self.notifications)} notifications;",
+            dict(self.list_updates),
         )
-        if apostrophe_words:
-            notification_actions = {
-                spoken_form.replace(mangled_word, word): action
-                for mangled_word, word in apostrophe_words.items()
-                for spoken_form, action in notification_actions.items()
-                if "apostrophe" not in spoken_form
-            }
+
+    @staticmethod
+    def update_action_list(notification_actions):
+        notification_actions = action_spoken_forms(tuple(sorted(notification_actions)))
         if notification_actions:
             debug_print("actions", notification_actions)
-
-        if "close" not in notification_actions and "clear all" in notification_actions:
-            # allow closing a notification stack like an individual notification
-            notification_actions["close"] = "clear all"
         ctx.lists["user.notification_actions"] = notification_actions
+        debug_print(
+            "spoken form cache",
+            spoken_forms.cache_info(),
+            action_spoken_forms.cache_info(),
+        )
 
+    @staticmethod
+    def update_app_list(notification_apps):
         # XXX(nriley) use app name overrides from knausj?
-        notification_apps = actions.user.create_spoken_forms_from_list(
-            notification_apps
-        )
+        notification_apps = spoken_forms(tuple(sorted(filter(None, notification_apps))))
         ctx.lists["user.notification_apps"] = notification_apps
         if notification_apps:
             debug_print("apps", notification_apps)
 
-    def win_close(self, window):
-        if not window.app.pid == self.pid:
-            return
-
-        self.update_notifications()
-
     def app_closed(self, app):
         if app.pid == self.pid:
+            self.events.unsubscribe()
             ui.unregister("app_close", self.app_closed)
 
 
@@ -400,7 +1002,9 @@ def app_launched(app):
 
 
 def monitor():
-    global MONITOR
+    global HISTORY, MONITOR
+
+    HISTORY = NotificationHistory()
 
     apps = ui.apps(bundle="com.apple.notificationcenterui")
     if apps: